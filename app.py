@@ -6,10 +6,12 @@
 
 
 
+import os
 from dash import Dash
 import dash_bootstrap_components as dbc
 from src.layouts.layout import get_layout
-from src.callbacks import register_callbacks, party_set_options, default_start, default_end
+from src.callbacks import register_callbacks, warm_shared_data
+from src.callbacks.shared import start_shared_data_watcher
 from src.db.notes_db import init_db, upsert_note
 from flask import request
 
@@ -30,8 +32,21 @@ def check_spotify_callback():
         except Exception as e:
             return f"❌ Spotify authorization failed: {e}"
 
-app.layout = get_layout(party_set_options, default_start, default_end)
+app.layout = get_layout()
 register_callbacks(app)
 
+def start_background_work():
+    # Shared data loads in the background; the layout is served right away and the
+    # tabs that need the data show a loading state until it is ready.
+    warm_shared_data()
+    start_shared_data_watcher()  # picks up sets played while the dashboard is running
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    debug = True
+    # The debug reloader runs this file twice: in a parent process that only
+    # watches the source files, and in the child that serves (WERKZEUG_RUN_MAIN set).
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_work()
+    app.run(debug=debug)
+else:
+    start_background_work()  # imported by a WSGI server (e.g. gunicorn app:server)
@@ -0,0 +1,75 @@
+// Individual playlist tab: the table and the BPM flow chart are drawn here from
+// individual-playlist-store (columnar JSON written by load_individual_playlist
+// in src/callbacks/individual.py), so they need no server round trip.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    individual: {
+        tableData: function (store) {
+            if (!store || !store.title.length) {
+                return [];
+            }
+            return store.title.map(function (title, i) {
+                var duration = store.duration[i];
+                return {
+                    title: title,
+                    artist: store.artist[i],
+                    album: store.album[i],
+                    bpm: duration === null ? null : (store.bpm[i] || 0),
+                    duration: duration === null ? "N/A" : formatDuration(duration),
+                    times_played: store.times_played[i],
+                    play: "▶"
+                };
+            });
+        },
+
+        bpmFigure: function (store, template) {
+            if (!store || !store.title.length) {
+                return {};
+            }
+            // Elapsed minutes at the end of each track; tracks without a duration get no point
+            var elapsed = 0;
+            var x = store.duration.map(function (seconds) {
+                if (seconds === null) {
+                    return null;
+                }
+                elapsed += seconds;
+                return elapsed / 60;
+            });
+            var customdata = store.title.map(function (title, i) {
+                return [title, store.artist[i], store.rating[i]];
+            });
+            return {
+                data: [{
+                    type: "scatter",
+                    mode: "lines+markers",
+                    x: x,
+                    y: store.bpm,
+                    customdata: customdata,
+                    hovertemplate: "bpm=%{y}<br>title=%{customdata[0]}<br>artist=%{customdata[1]}" +
+                        "<br>rating=%{customdata[2]}<extra></extra>",
+                    line: {color: "#1F77B4", dash: "solid"},
+                    marker: {symbol: "circle"},
+                    name: "",
+                    showlegend: false
+                }],
+                layout: {
+                    template: template,
+                    title: {
+                        text: "BPM vs. Cumulative Elapsed Time (Total Duration: " + (elapsed / 60).toFixed(1) + " min)"
+                    },
+                    xaxis: {title: {text: "Elapsed Time (minutes)"}},
+                    yaxis: {title: {text: "BPM"}},
+                    legend: {tracegroupgap: 0}
+                }
+            };
+        }
+    }
+});
+
+// Same HH:MM:SS as format_duration() in src/database/database.py
+function formatDuration(seconds) {
+    var total = Math.trunc(seconds);
+    var parts = [Math.floor(total / 3600), Math.floor((total % 3600) / 60), total % 60];
+    return parts.map(function (part) {
+        return String(part).padStart(2, "0");
+    }).join(":");
+}
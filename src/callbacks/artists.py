@@ -0,0 +1,90 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# --- Artist name normalization ---
+# Patterns are compiled once. The input is lowercased first; IGNORECASE is kept
+# so the patterns behave exactly as they always have.
+_APOSTROPHE_SPACE = re.compile(r"'\s+(\w)")
+_JR_SR = re.compile(r",\s*(jr|sr)\.?\b", re.IGNORECASE)
+_CONNECTORS = re.compile(r"[\/,&;]|\s+(feat\.?|ft\.?|with|vs\.?)\s+", re.IGNORECASE)
+# Run after the connectors are standardized, so " and her handsome devils" is
+# caught even if the original was "& her...".
+_REMOVE_PATTERNS = [
+    re.compile(r"\s+and\s+(his|her|the)\s+[\w\s]+", re.IGNORECASE), # Simplified and combined pattern
+    re.compile(r"\bvocal\sby\b", re.IGNORECASE),
+    re.compile(r"\b's\sspacemen\b", re.IGNORECASE),
+    re.compile(r"\bbig\sband\b", re.IGNORECASE),
+    re.compile(r"\s+\b(trio|quartet|quintet|sextet|septet)\b", re.IGNORECASE),
+]
+
+# The same few thousand artist strings repeat across the whole library and every set.
+ARTIST_CACHE_SIZE = 65536
+# Bump whenever the rules above change: the stored track_artists bridge is
+# re-parsed for every track whose rows were built by an older version.
+NORMALIZER_VERSION = 1
+
+
+def _custom_title(name):
+    """A smarter title-casing function to handle names with apostrophes."""
+    # First, fix spacing issues like "o' day" by turning it into "o'day"
+    name = _APOSTROPHE_SPACE.sub(r"'\1", name)
+    # Then, apply the standard title case
+    return name.title()
+
+
+@lru_cache(maxsize=ARTIST_CACHE_SIZE)
+def _split_artists(artist_str):
+    # Lowercase for uniform processing
+    s = artist_str.lower()
+    s = _JR_SR.sub(r" \1", s)
+    s = _CONNECTORS.sub(" and ", s)
+    for pattern in _REMOVE_PATTERNS:
+        s = pattern.sub("", s)
+    return tuple(_custom_title(a.strip()) for a in s.split(" and ") if a.strip())
+
+
+def clean_and_split_artists(artist_str):
+    """Split a raw Mixxx artist string into normalized artist names (memoized)."""
+    if not isinstance(artist_str, str):
+        return []
+    return list(_split_artists(artist_str))
+
+
+def clean_and_split_artists_series(artists):
+    """
+    Batch version of clean_and_split_artists for a pandas Series.
+    Every distinct value is normalized once and the result mapped back onto
+    the rows; rows with the same artist string share the same list object.
+    """
+    codes, uniques = pd.factorize(artists, use_na_sentinel=True)
+    parsed = [clean_and_split_artists(value) for value in uniques]
+    empty = []
+    return pd.Series([parsed[code] if code >= 0 else empty for code in codes],
+                     index=artists.index, dtype=object)
+
+
+def explode_artists(df, track_artists):
+    """
+    One row per (track row, normalized artist), with the name in 'artist_list'.
+    Artists come from the precomputed track_id -> artist bridge; tracks the
+    bridge does not know yet are normalized on the fly. Row order matches
+    df.explode() on the parsed artist lists.
+    """
+    df = df.assign(_row=np.arange(len(df)))
+    bridge = track_artists.rename(columns={"artist": "artist_list"})
+    exploded = df.merge(bridge, on="track_id", how="inner")
+
+    unknown = df[~df["track_id"].isin(bridge["track_id"])]
+    if not unknown.empty:
+        parsed = unknown.assign(artist_list=clean_and_split_artists_series(unknown["artist"])).explode("artist_list")
+        parsed = parsed[parsed["artist_list"].notna()]
+        exploded = pd.concat([exploded, parsed], ignore_index=True)
+        exploded = exploded.sort_values("_row", kind="stable")
+    return exploded.drop(columns="_row").reset_index(drop=True)
+
+
+def artist_cache_info():
+    """Hit/miss statistics of the normalization cache."""
+    return _split_artists.cache_info()
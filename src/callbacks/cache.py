@@ -0,0 +1,98 @@
+import sys
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def make_key(*parts):
+    """
+    Canonical hash of JSON-serializable parts. Callers normalise the parts
+    first (e.g. sort id lists) so equivalent inputs produce the same key.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_size(obj):
+    """Approximate memory footprint in bytes of plain data (dicts, lists, tuples, scalars)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in obj)
+    return size
+
+
+class LRUCache:
+    """
+    A small thread-safe least-recently-used cache with hit/miss counters.
+    With `maxbytes`, entries are also evicted once their total estimated size
+    (`sizeof`, estimate_size by default) goes over it; a single value larger
+    than maxbytes is not kept at all.
+    """
+
+    def __init__(self, maxsize=32, maxbytes=None, sizeof=estimate_size):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self.bytes -= self._sizes.pop(key, 0)
+            if self.maxbytes is not None and size > self.maxbytes:
+                self._data.pop(key, None)
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self.bytes += size
+            while self._data and (len(self._data) > self.maxsize
+                                  or (self.maxbytes is not None and self.bytes > self.maxbytes)):
+                old_key, _ = self._data.popitem(last=False)
+                self.bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+                "maxbytes": self.maxbytes,
+            }
@@ -3,8 +3,54 @@ from dash import dcc, html, dash_table, no_update
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
-from src.database.database import get_crates, get_songs_not_in_crates, format_duration, get_songs_for_crate, get_crate_counts, get_all_crates_summary
+from src.database.database import (
+    get_crates,
+    get_songs_not_in_crates,
+    format_durations,
+    get_songs_for_crates,
+    get_crate_tracks,
+    get_library_songs_by_ids,
+    get_database_fingerprint,
+)
+from src.database.crate_tree import CrateTree
+from src.database.crate_membership import CrateMembership
+from .cache import LRUCache
+from .table_styles import bar_styles, heatmap_styles
+
+# Crate tree and membership index, built together once per database state and
+# shared by every crate callback.
+_crate_cache = LRUCache(maxsize=1)
+# Tracks in at least this many crates are counted as heavily shared.
+MANY_CRATES = 3
+
+
+def _get_crate_index():
+    fingerprint = get_database_fingerprint()
+    index = _crate_cache.get(fingerprint)
+    if index is None:
+        crates = get_crates()
+        crate_tracks = get_crate_tracks()
+        index = {
+            "tree": CrateTree(crates, crate_tracks),
+            "membership": CrateMembership([crate["id"] for crate in crates], crate_tracks),
+        }
+        _crate_cache.put(fingerprint, index)
+    return index
+
+
+def get_crate_tree():
+    return _get_crate_index()["tree"]
+
+
+def get_crate_membership():
+    return _get_crate_index()["membership"]
+
+
+def _crate_label(tree, crate_id):
+    return " / ".join(tree.crate_path(crate_id))
+
 
 def register_crates_callbacks(app):
     @app.callback(
@@ -17,54 +63,18 @@ def register_crates_callbacks(app):
     def update_crate_structure_chart(active_tab, chart_type):
         if active_tab != "crates":
             return no_update
-        crates = get_crates()
-        if not crates:
+        tree = get_crate_tree()
+        if not tree.crates:
             return {}
-            
-        counts = get_crate_counts()
-        
-        # We need to build all unique nodes, because users might not have explicitly created the parent crate.
-        # E.g. they have "Swing - Fast" but never created "Swing" alone.
-        all_paths = set()
-        for crate in crates:
-            parts = [p.strip() for p in crate["name"].split("-") if p.strip()]
-            for i in range(1, len(parts) + 1):
-                all_paths.add("/".join(parts[:i]))
-                
-        all_paths = sorted(list(all_paths))
-        
-        # Calculate cumulative songs per path
-        path_counts = {}
-        for path in all_paths:
-            total = 0
-            for crate in crates:
-                crate_parts = [p.strip() for p in crate["name"].split("-") if p.strip()]
-                crate_path = "/".join(crate_parts)
-                if crate_path == path or crate_path.startswith(path + "/"):
-                    total += counts.get(crate['id'], 0)
-            path_counts[path] = total
 
+        # Only leaf crates go into the dataframe; plotly infers the parents,
+        # including ones that were never created as crates themselves
+        # (e.g. "Swing - Fast" exists but "Swing" alone does not).
         data = []
         max_levels = 0
-        # Helper to check if a crate is a parent of another
-        all_crate_parts = []
-        for crate in crates:
-            parts = [p.strip() for p in crate["name"].split("-") if p.strip()]
-            all_crate_parts.append(parts)
-
-        for crate in crates:
-            parts = [p.strip() for p in crate["name"].split("-") if p.strip()]
-            
-            # Check if this crate is a prefix of any other crate
-            is_parent = False
-            for other_parts in all_crate_parts:
-                if other_parts != parts and len(other_parts) > len(parts) and other_parts[:len(parts)] == parts:
-                    is_parent = True
-                    break
-            
-            # Only add leaf crates to the dataframe for sunburst
-            # Plotly will infer parents automatically
-            if not is_parent:
+        for crate in tree.crates:
+            if tree.is_leaf_crate(crate["id"]):
+                parts = tree.crate_path(crate["id"])
                 max_levels = max(max_levels, len(parts))
                 row = {f"level{i+1}": part for i, part in enumerate(parts)}
                 data.append(row)
@@ -85,8 +95,9 @@ def register_crates_callbacks(app):
             trace = fig.data[0]
             custom_hover = []
             for path_id in trace.ids:
-                if path_id in path_counts:
-                    custom_hover.append(f"{path_counts[path_id]} songs")
+                node = tree.find(path_id)
+                if node is not None and node.path:
+                    custom_hover.append(f"{node.song_count} songs<br>{node.unique_tracks} unique")
                 else:
                     custom_hover.append("")
             
@@ -101,30 +112,25 @@ def register_crates_callbacks(app):
         return fig
 
     @app.callback(
-        dash.Output("crate-structure-table", "data"),
+        [dash.Output("crate-structure-table", "data"),
+         dash.Output("crate-structure-table", "style_data_conditional")],
         dash.Input("tabs", "active_tab")
     )
     def update_crate_structure_table(active_tab):
         if active_tab != "crates":
-            return no_update
-            
-        summaries = get_all_crates_summary()
-        if not summaries:
-            return []
+            return no_update, no_update
             
+        tree = get_crate_tree()
         data = []
-        for row in summaries:
-            parts = [p.strip() for p in row["name"].split("-") if p.strip()]
-            path = " / ".join(parts)
-            
+        for crate in tree.crates:
             data.append({
-                "Crate Path": path,
-                "Total Songs": row.get("total_songs", 0)
+                "Crate Path": _crate_label(tree, crate["id"]),
+                "Total Songs": tree.crate_counts[crate["id"]]
             })
             
         # Sort alphabetically by path
         data.sort(key=lambda x: x["Crate Path"])
-        return data
+        return data, bar_styles([row["Total Songs"] for row in data], "Total Songs")
 
     @app.callback(
         dash.Output("songs-without-crate-table", "data"),
@@ -139,8 +145,7 @@ def register_crates_callbacks(app):
         df = pd.DataFrame(songs)
         df["bpm"] = pd.to_numeric(df["bpm"], errors="coerce")
         df["bpm"] = df["bpm"].fillna(0)
-        df["duration"] = pd.to_numeric(df["duration"], errors="coerce")
-        df["duration"] = df["duration"].apply(lambda x: format_duration(x) if pd.notna(x) else "N/A")
+        df["duration"] = format_durations(df["duration"])
         df = df.sort_values("artist")
         return df.to_dict("records")
 
@@ -174,38 +179,83 @@ def register_crates_callbacks(app):
         if not clicked_path:
              return []
         
-        clicked_parts = clicked_path.split("/")
-        crates = get_crates()
-        target_crate_ids = []
-        
-        # Find all crates that are at or below the clicked path
-        for crate in crates:
-            parts = [p.strip() for p in crate["name"].split("-") if p.strip()]
-            if len(parts) >= len(clicked_parts) and parts[:len(clicked_parts)] == clicked_parts:
-                target_crate_ids.append(crate['id'])
-        
-        if target_crate_ids:
-             all_songs = []
-             for crate_id in target_crate_ids:
-                 songs = get_songs_for_crate(crate_id)
-                 if songs:
-                     all_songs.extend(songs)
-                     
-             if not all_songs:
-                 return []
-                 
-             df = pd.DataFrame(all_songs)
-             # Drop duplicates in case a song is in multiple subcrates
-             df = df.drop_duplicates(subset=['artist', 'title'])
-             
-             df["bpm"] = pd.to_numeric(df["bpm"], errors="coerce")
-            
-             # Handle any missing BPMs so dash_table numeric formatting doesn't crash 
-             df["bpm"] = df["bpm"].fillna(0)
-             
-             df["duration"] = pd.to_numeric(df["duration"], errors="coerce")
-             df["duration"] = df["duration"].apply(lambda x: format_duration(x) if pd.notna(x) else "N/A")
-             
-             df = df.sort_values(["artist", "title"])
-             return df.to_dict("records")
-        return []
+        # All crates at or below the clicked path
+        target_crate_ids = get_crate_tree().crate_ids_under(clicked_path)
+        songs = get_songs_for_crates(target_crate_ids)
+        if not songs:
+            return []
+
+        # One row per (artist, title) even if it sits in several sub-crates, already sorted
+        df = pd.DataFrame(songs)
+        df["bpm"] = pd.to_numeric(df["bpm"], errors="coerce")
+
+        # Handle any missing BPMs so dash_table numeric formatting doesn't crash
+        df["bpm"] = df["bpm"].fillna(0)
+        df["duration"] = format_durations(df["duration"])
+        return df.to_dict("records")
+
+    @app.callback(
+        [dash.Output("crate-overlap-heatmap", "figure"),
+         dash.Output("crate-coverage-table", "data"),
+         dash.Output("crate-coverage-table", "style_data_conditional"),
+         dash.Output("crate-multi-count", "children"),
+         dash.Output("crate-set-dropdown", "options")],
+        dash.Input("tabs", "active_tab")
+    )
+    def update_crate_overlap(active_tab):
+        if active_tab != "crates":
+            return no_update, no_update, no_update, no_update, no_update
+        tree = get_crate_tree()
+        membership = get_crate_membership()
+        if not membership.crate_ids:
+            return {}, [], [], "", []
+
+        labels = [_crate_label(tree, crate_id) for crate_id in membership.crate_ids]
+        overlap = membership.overlap()
+        sizes = overlap.diagonal()
+        # Jaccard index for the hover: shared / (size a + size b - shared)
+        union = sizes[:, None] + sizes[None, :] - overlap
+        jaccard = np.divide(overlap, union, out=np.zeros(overlap.shape), where=union > 0)
+        fig = go.Figure(go.Heatmap(
+            z=overlap, x=labels, y=labels, customdata=jaccard, colorscale="YlOrBr",
+            hovertemplate="<b>%{y}</b><br><b>%{x}</b><br>%{z} shared songs (Jaccard %{customdata:.2f})<extra></extra>"
+        ))
+        fig.update_layout(title="Crate Overlap", margin=dict(t=40, l=0, r=0, b=0),
+                          xaxis=dict(showticklabels=len(labels) <= 40), yaxis=dict(autorange="reversed"))
+
+        unique = membership.unique_counts()
+        coverage = pd.DataFrame({
+            "Crate Path": labels,
+            "Songs": sizes,
+            "Only Here": unique,
+            "Unique %": np.round(np.divide(unique * 100, sizes, out=np.zeros(len(sizes)), where=sizes > 0), 1),
+        }).sort_values("Crate Path")
+
+        many = len(membership.tracks_in_at_least(MANY_CRATES))
+        options = sorted(({"label": label, "value": crate_id} for crate_id, label in zip(membership.crate_ids, labels)),
+                         key=lambda option: option["label"])
+        # Crates whose songs are mostly nowhere else turn gold
+        coverage_styles = heatmap_styles(coverage["Unique %"], "Unique %")
+        return fig, coverage.to_dict("records"), coverage_styles, f"Songs in {MANY_CRATES}+ crates: {many}", options
+
+    @app.callback(
+        [dash.Output("crate-set-table", "data"),
+         dash.Output("crate-set-count", "children")],
+        [dash.Input("crate-set-dropdown", "value"),
+         dash.Input("crate-set-mode", "value")]
+    )
+    def update_crate_set(crate_ids, mode):
+        if not crate_ids:
+            return [], ""
+        membership = get_crate_membership()
+        if mode == "intersection":
+            track_ids = membership.intersection(crate_ids)
+        else:
+            track_ids = membership.union(crate_ids)
+        songs = get_library_songs_by_ids(track_ids.tolist())
+        if not songs:
+            return [], "0 songs"
+        df = pd.DataFrame(songs).drop(columns="id")
+        df["bpm"] = pd.to_numeric(df["bpm"], errors="coerce").fillna(0)
+        df = df.sort_values(["artist", "title"])
+        return df.to_dict("records"), f"{len(df)} songs"
@@ -1,7 +1,7 @@
 import dash
-from dash import dcc, dash_table, html,ctx
+from dash import dcc, dash_table, html,ctx, ClientsideFunction
 import pandas as pd
-from src.database.database import get_tracks_for_playlist, format_duration
+from src.database.database import get_tracks_for_playlist, get_database_fingerprint
 from src.db import get_note, upsert_note
 from datetime import datetime
 import dash_bootstrap_components as dbc
@@ -10,6 +10,39 @@ import spotipy
 from spotipy.oauth2 import SpotifyOAuth,  SpotifyClientCredentials
 import logging
 import os
+import threading
+from .spotify_resolver import SpotifyResolver, track_key, prefetch_in_background
+from .jobs import job_queue
+from .cache import LRUCache
+
+# Tracks of recently viewed sets, keyed by (database fingerprint, playlist id) so
+# a database change is a new version. Selecting a set fires several callbacks
+# (table, plot) and exports read the same set: they share one fetch.
+PLAYLIST_TRACK_CACHE_SIZE = 64
+PLAYLIST_TRACK_CACHE_BYTES = 32 * 1024 * 1024
+_playlist_track_cache = LRUCache(maxsize=PLAYLIST_TRACK_CACHE_SIZE, maxbytes=PLAYLIST_TRACK_CACHE_BYTES)
+_playlist_track_lock = threading.Lock()
+
+
+def get_playlist_tracks(playlist_id):
+    """
+    get_tracks_for_playlist() through the playlist track cache. Returns fresh
+    dict copies, so callers may edit them.
+    """
+    key = (get_database_fingerprint(), playlist_id)
+    # Sibling callbacks arrive together; under the lock only the first one queries
+    # and the others find its result. One get per call keeps the hit/miss stats exact.
+    with _playlist_track_lock:
+        tracks = _playlist_track_cache.get(key)
+        if tracks is None:
+            tracks = tuple(get_tracks_for_playlist(playlist_id))
+            _playlist_track_cache.put(key, tracks)
+    return [dict(track) for track in tracks]
+
+
+def get_playlist_track_cache_stats():
+    """Hit/miss, eviction and byte statistics of the playlist track cache."""
+    return _playlist_track_cache.stats()
 
 # Define the path where Render mounts the secret file
 SECRET_FILE_PATH = '/etc/secrets/config.json'
@@ -28,6 +61,8 @@ auth_manager = SpotifyClientCredentials(
     client_secret=config['spotify']['client_secret']
 )
 sp = spotipy.Spotify(auth_manager=auth_manager)
+# Resolves the ▶ clicks; shares the spotify_tracks cache with the exporter.
+player_resolver = SpotifyResolver(sp)
 
 def get_auth_manager():
     """Helper to return a configured SpotifyOAuth object that doesn't hang."""
@@ -47,28 +82,29 @@ def get_auth_manager():
         open_browser=False  # CRITICAL: prevents dashboard from hanging!
     )
 
-def export_mixxx_to_spotify(mixxx_playlist_id: int, playlist_name: str = None) -> str:
-    """Export a Mixxx playlist to Spotify. Returns the Spotify playlist URL."""
-    auth_manager = get_auth_manager()
-    sp = spotipy.Spotify(auth_manager=auth_manager)
+def export_mixxx_to_spotify(mixxx_playlist_id: int, playlist_name: str = None, client=None, progress=None) -> str:
+    """
+    Export a Mixxx playlist to Spotify. Returns the Spotify playlist URL.
+    `client` defaults to an OAuth spotipy client; progress(done, total) is
+    called while tracks are resolved.
+    """
+    sp = client or spotipy.Spotify(auth_manager=get_auth_manager())
     user_id = sp.me()['id']
 
-    mixxx_tracks = get_tracks_for_playlist(mixxx_playlist_id)
+    mixxx_tracks = get_playlist_tracks(mixxx_playlist_id)
+    songs = [(track.get("artist"), track.get("title")) for track in mixxx_tracks]
+    matches = SpotifyResolver(sp).resolve(songs, progress=progress)
 
     track_uris = []
     not_found = []
-    for track in mixxx_tracks:
-        artist = track.get("artist", "").strip()
-        title = track.get("title", "").strip()
-        if not artist or not title:
+    for artist, title in songs:
+        key = track_key(artist, title)
+        if key is None:
             continue
-        query = f"artist:{artist} track:{title}"
-        res = sp.search(q=query, type="track", limit=1)
-        items = res.get("tracks", {}).get("items", [])
-        if items:
-            track_uris.append(items[0]["uri"])
+        if matches[key]:
+            track_uris.append(matches[key]["uri"])
         else:
-            not_found.append(f"{artist} — {title}")
+            not_found.append(f"{artist.strip()} — {title.strip()}")
 
     # Use the real playlist name if provided, fall back to ID
     sp_playlist_name = playlist_name if playlist_name else f"Mixxx Set {mixxx_playlist_id}"
@@ -95,91 +131,80 @@ def export_mixxx_to_spotify(mixxx_playlist_id: int, playlist_name: str = None) -
 
 from src.callbacks.shared import get_shared_data
 
+def _export_job(progress, playlist_id, playlist_name=None):
+    """Job body of a queued Spotify export (see src/callbacks/jobs.py)."""
+    return export_mixxx_to_spotify(playlist_id, playlist_name=playlist_name, progress=progress)
+
+
+job_queue.register("spotify_export", _export_job)
+
+HIDDEN = {"display": "none"}
+STORE_COLUMNS = ["position", "title", "artist", "album", "bpm", "duration", "rating"]
+
+
+def playlist_store_data(tracks, playlist_counts):
+    """
+    Columnar JSON of a set for individual-playlist-store: one list per column,
+    rows in position order. bpm is rounded here so the table and the plot agree;
+    times_played is how often each song had been played up to this set.
+    """
+    df = pd.DataFrame(tracks, columns=STORE_COLUMNS).sort_values("position", kind="stable")
+    for col in ("bpm", "duration", "rating"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["bpm"] = df["bpm"].round(0)
+    df["times_played"] = [playlist_counts.get(key, 0) for key in zip(df["artist"], df["title"])]
+    df = df.astype(object).where(df.notna(), None)
+    return {col: df[col].tolist() for col in df.columns}
+
+
 def register_individual_callbacks(app):
 
     @app.callback(
-        dash.Output("individual-playlist-table", "data"),
+        dash.Output("individual-playlist-store", "data"),
         dash.Input("individual-playlist-dropdown", "value")
     )
-    def update_individual_playlist(selected_playlist):
+    def load_individual_playlist(selected_playlist):
+        # The table and the BPM plot are built in the browser from this store
+        # (assets/individual_playlist.js); the server only fetches the set.
         if not selected_playlist:
-            return []
-            
-        shared = get_shared_data()
-        playlist_song_history = shared.get("playlist_song_history", {})
-        
-        # Get counts for THIS playlist specifically (snapshot in time)
-        current_playlist_counts = playlist_song_history.get(selected_playlist, {})
-        
-        tracks = get_tracks_for_playlist(selected_playlist)
-        for track in tracks:
-            try:
-                track["duration"] = format_duration(track.get("duration"))
-                track["bpm"] = round(float(track.get("bpm") or 0))
-            except Exception:
-                track["duration"] = "N/A"
-                track["bpm"] = None
-            
-            # Add times_played
-            key = (track.get("artist"), track.get("title"))
-            track["times_played"] = current_playlist_counts.get(key, 0)
-            
-            track["play"] = "▶"
-        return tracks
+            return None
 
-    @app.callback(
+        tracks = get_playlist_tracks(selected_playlist)
+        # Warm the Spotify cache so ▶ clicks in this set answer from it
+        prefetch_in_background(player_resolver, selected_playlist,
+                               [(track.get("artist"), track.get("title")) for track in tracks])
+        return playlist_store_data(tracks, get_shared_data()["play_order"].set_play_counts(selected_playlist))
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="individual", function_name="tableData"),
+        dash.Output("individual-playlist-table", "data"),
+        dash.Input("individual-playlist-store", "data")
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="individual", function_name="bpmFigure"),
         dash.Output("individual-playlist-cumulative-plot", "figure"),
-        dash.Input("individual-playlist-dropdown", "value")
+        dash.Input("individual-playlist-store", "data"),
+        dash.State("individual-plot-template", "data")
     )
-    def update_individual_playlist_plot(selected_playlist):
-        if not selected_playlist:
-            return {}
-        tracks = get_tracks_for_playlist(selected_playlist)
-        if not tracks:
-            return {}
-        df = pd.DataFrame(tracks)
-        df["bpm"] = pd.to_numeric(df["bpm"], errors="coerce").round(0).astype("Int64")
-        df["duration"] = pd.to_numeric(df["duration"], errors="coerce")
-        df = df.sort_values("position")
-        df["cumulative_time"] = df["duration"].cumsum() / 60.0
-        total_duration = df["duration"].sum() / 60.0
-        title_text = f"BPM vs. Cumulative Elapsed Time (Total Duration: {total_duration:.1f} min)"
-        import plotly.express as px
-        fig = px.line(
-            df,
-            x="cumulative_time",
-            y="bpm",
-            markers=True,
-            title=title_text,
-            hover_data={
-                "title": True,
-                "artist": True,
-                "rating": True,
-                "bpm": True,
-                "duration": False,
-                "cumulative_time": False
-            }
-        )
-        fig.update_layout(xaxis_title="Elapsed Time (minutes)", yaxis_title="BPM")
-        return fig
 
     @app.callback(
-    dash.Output("export-spotify-link", "children"),
+    [dash.Output("export-spotify-link", "children"),
+     dash.Output("export-job-id", "data"),
+     dash.Output("export-progress-poll", "disabled"),
+     dash.Output("export-progress", "style")],
     dash.Input("export-spotify-btn", "n_clicks"),
     dash.State("individual-playlist-dropdown", "value"),
     prevent_initial_call=True
     )
     def on_export(n_clicks, mixxx_playlist_id):
+        # Only checks and queues; the export itself runs as a background job.
         if not mixxx_playlist_id:
-            return dbc.Alert("⚠️ Please select a playlist first.", color="warning", dismissable=True)
+            return dbc.Alert("⚠️ Please select a playlist first.", color="warning", dismissable=True), None, True, HIDDEN
 
-        # Look up the real playlist name from shared data
-        shared = get_shared_data()
-        options = shared.get("party_set_options", [])
-        playlist_name = next(
-            (opt["label"] for opt in options if opt["value"] == mixxx_playlist_id),
-            None
-        )
+        # Look up the real playlist name from the shared set index
+        set_meta = get_shared_data()["sets"].get(mixxx_playlist_id)
+        playlist_name = set_meta.name if set_meta else None
 
         try:
             # Check for valid token first to avoid hanging!
@@ -193,13 +218,38 @@ def register_individual_callbacks(app):
                         html.A("Click here to authorize", href=auth_url, target="_blank", className="alert-link"),
                         ". After authorizing, close the new tab and click Export again."
                     ], color="warning")
-                ])
+                ]), None, True, HIDDEN
 
-            url = export_mixxx_to_spotify(mixxx_playlist_id, playlist_name=playlist_name)
-            return html.A("✅ Open in Spotify", href=url, target="_blank",
-                          style={"fontWeight": "bold", "fontSize": "16px"})
+            job_id = job_queue.submit("spotify_export", playlist_id=mixxx_playlist_id, playlist_name=playlist_name)
+            return "", job_id, False, {"display": "flex"}
         except Exception as e:
-            return dbc.Alert(f"❌ Error exporting: {e}", color="danger", dismissable=True)
+            return dbc.Alert(f"❌ Error exporting: {e}", color="danger", dismissable=True), None, True, HIDDEN
+
+    @app.callback(
+        [dash.Output("export-progress", "value"),
+         dash.Output("export-progress", "label"),
+         dash.Output("export-spotify-link", "children", allow_duplicate=True),
+         dash.Output("export-progress-poll", "disabled", allow_duplicate=True),
+         dash.Output("export-progress", "style", allow_duplicate=True)],
+        dash.Input("export-progress-poll", "n_intervals"),
+        dash.State("export-job-id", "data"),
+        prevent_initial_call=True
+    )
+    def poll_export_job(n_intervals, job_id):
+        job = job_queue.get(job_id) if job_id else None
+        if job is None:
+            return 0, "", dash.no_update, True, HIDDEN
+        if job["status"] == "done":
+            link = html.A("✅ Open in Spotify", href=job["result_url"], target="_blank",
+                          style={"fontWeight": "bold", "fontSize": "16px"})
+            return 100, "", link, True, HIDDEN
+        if job["status"] == "failed":
+            alert = dbc.Alert(f"❌ Error exporting: {job['error']}", color="danger", dismissable=True)
+            return 0, "", alert, True, HIDDEN
+        done, total = job["progress_done"], job["progress_total"]
+        if not total:
+            return 0, "Starting export...", dash.no_update, False, dash.no_update
+        return 100 * done / total, f"Matching tracks {done}/{total}", dash.no_update, False, dash.no_update
 
     # New callback to load note and rating when playlist changes
     @app.callback(
@@ -242,13 +292,10 @@ def register_individual_callbacks(app):
 
         row = active_cell["row"]
         track = table_data[row]
-        query = f"artist:{track['artist']} track:{track['title']}"
 
-        results = sp.search(q=query, type="track", limit=1)
-        items = results.get("tracks", {}).get("items", [])
-        if not items:
-            return ""  
+        match = player_resolver.resolve_one(track.get("artist"), track.get("title"))
+        if not match:
+            return ""
 
-        track_id = items[0]["id"]
-        embed_url = f"https://open.spotify.com/embed/track/{track_id}"
+        embed_url = f"https://open.spotify.com/embed/track/{match['id']}"
         return embed_url
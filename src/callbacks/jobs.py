@@ -0,0 +1,140 @@
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from src.db import create_job, update_job, get_job, touch_jobs, fail_stale_jobs
+
+# --- Background jobs ---
+# Long-running work (Spotify exports) runs outside the Dash request: a callback
+# submits a job and returns at once, and a dcc.Interval poller reads the job's
+# status/progress from the jobs table in extra_features.sqlite. Jobs run on an
+# in-process executor; there is no external broker.
+# Several server processes (gunicorn workers) share the jobs table, so each job
+# row records its owner process and a heartbeat the owner refreshes while the
+# job is queued or running. A job is only failed as interrupted once its
+# heartbeat is stale, i.e. the process that ran it is gone.
+JOB_WORKERS = 2
+PROGRESS_WRITE_INTERVAL = 0.25  # seconds between progress writes to the jobs table
+HEARTBEAT_INTERVAL = 10.0  # seconds between heartbeats of a process's unfinished jobs
+STALE_AFTER = timedelta(seconds=60)  # heartbeat age after which a job's process is considered gone
+INTERRUPTED_ERROR = "Interrupted: the server process running it stopped"
+
+
+class InlineExecutor:
+    """Executor stand-in that runs each job right away in the caller's thread (scripts, tests)."""
+
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+class JobQueue:
+    """
+    Runs registered job kinds on `executor` (a thread pool by default; anything
+    with submit(fn, *args) works). A job function is called as
+    func(progress, **params), reports progress(done, total) and returns the
+    result URL. With heartbeat_interval=None no heartbeat thread is started and
+    heartbeat() must be called by the owner (tests).
+    """
+
+    def __init__(self, executor=None, workers=JOB_WORKERS, heartbeat_interval=HEARTBEAT_INTERVAL,
+                 stale_after=STALE_AFTER):
+        self._executor = executor
+        self._workers = workers
+        self._heartbeat_interval = heartbeat_interval
+        self._stale_after = stale_after
+        self._executor_lock = threading.Lock()
+        self._handlers = {}
+        self._active = set()  # ids of this process's queued/running jobs
+        self._active_lock = threading.Lock()
+        self._heartbeat_thread = None
+
+    @property
+    def owner(self):
+        # Read per call: the pid differs in workers forked after import
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def register(self, kind, func):
+        self._handlers[kind] = func
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="job")
+            if self._heartbeat_interval is not None and (
+                    self._heartbeat_thread is None or not self._heartbeat_thread.is_alive()):
+                self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat",
+                                                          daemon=True)
+                self._heartbeat_thread.start()
+            return self._executor
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self._heartbeat_interval)
+            try:
+                self.heartbeat()
+            except Exception:
+                logging.exception("Job heartbeat failed")
+
+    def heartbeat(self):
+        """Refresh the heartbeat of this process's queued/running jobs."""
+        with self._active_lock:
+            job_ids = list(self._active)
+        if job_ids:
+            touch_jobs(job_ids)
+
+    def fail_stale(self, job_id=None):
+        """Fail the jobs (or one job) whose owner stopped sending heartbeats. Returns how many."""
+        return fail_stale_jobs(INTERRUPTED_ERROR, datetime.utcnow() - self._stale_after, job_id)
+
+    def submit(self, kind, **params):
+        """Queue a job and return its id."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        executor = self._get_executor()
+        job_id = uuid.uuid4().hex
+        create_job(job_id, kind, params, self.owner)
+        with self._active_lock:
+            self._active.add(job_id)
+        executor.submit(self._run, job_id, kind, params)
+        return job_id
+
+    def _run(self, job_id, kind, params):
+        try:
+            update_job(job_id, status="running")
+            last_write = 0.0
+
+            def progress(done, total):
+                nonlocal last_write
+                now = time.monotonic()
+                if done >= total or now - last_write >= PROGRESS_WRITE_INTERVAL:
+                    update_job(job_id, progress_done=done, progress_total=total)
+                    last_write = now
+
+            try:
+                result_url = self._handlers[kind](progress, **params)
+            except Exception as e:
+                logging.exception(f"Job {job_id} ({kind}) failed")
+                update_job(job_id, status="failed", error=str(e))
+            else:
+                update_job(job_id, status="done", result_url=result_url)
+        finally:
+            with self._active_lock:
+                self._active.discard(job_id)
+
+    def get(self, job_id):
+        """The job row; a queued/running job whose owner has gone quiet is failed first."""
+        job = get_job(job_id)
+        if job and job["status"] in ("queued", "running") and self._is_stale(job) and self.fail_stale(job_id):
+            job = get_job(job_id)
+        return job
+
+    def _is_stale(self, job):
+        heartbeat = job["heartbeat"]
+        return heartbeat is None or datetime.fromisoformat(heartbeat) < datetime.utcnow() - self._stale_after
+
+
+job_queue = JobQueue()
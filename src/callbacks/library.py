@@ -3,26 +3,57 @@ import dash
 #import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
-from src.database.database import get_library_songs
+from src.database.database import get_library_songs, get_database_fingerprint
+from .cache import LRUCache, make_key
+from .table_query import filter_frame, sort_frame, page_frame
+
+LIBRARY_COLUMNS = ["title", "artist", "album", "bpm", "rating"]
+
+# The library frame is loaded once per database state; filtered/sorted views
+# are kept so paging through one view only slices it.
+_library_cache = LRUCache(maxsize=1)
+_view_cache = LRUCache(maxsize=16)
+
+
+def _get_library_frame():
+    fingerprint = get_database_fingerprint()
+    lib_df = _library_cache.get(fingerprint)
+    if lib_df is None:
+        library_songs = get_library_songs()
+        lib_df = pd.DataFrame(library_songs) if library_songs else pd.DataFrame(columns=["id"] + LIBRARY_COLUMNS)
+        lib_df["bpm"] = pd.to_numeric(lib_df["bpm"], errors="coerce")
+        lib_df["rating"] = pd.to_numeric(lib_df["rating"], errors="coerce")
+        _library_cache.put(fingerprint, lib_df)
+        _view_cache.clear()
+    return fingerprint, lib_df
+
+
+def get_library_page(page_current, page_size, sort_by, filter_query):
+    """One page of the filtered, sorted library as (records, page_count)."""
+    fingerprint, lib_df = _get_library_frame()
+    key = make_key(fingerprint, filter_query or "", sort_by or [])
+    view = _view_cache.get(key)
+    if view is None:
+        view = sort_frame(filter_frame(lib_df, filter_query), sort_by)[LIBRARY_COLUMNS]
+        _view_cache.put(key, view)
+    return page_frame(view, page_current, page_size)
+
 
 def register_library_callbacks(app):
     @app.callback(
         [dash.Output("library-total-songs", "children"),
-         dash.Output("library-rating-distribution", "figure"),
-         dash.Output("library-table", "data")],
+         dash.Output("library-rating-distribution", "figure")],
         dash.Input("tabs", "active_tab")
     )
     def update_library_tab(active_tab):
         if active_tab != "library":
             raise dash.exceptions.PreventUpdate
-        library_songs = get_library_songs()
-        lib_df = pd.DataFrame(library_songs) if library_songs else pd.DataFrame()
+        _, lib_df = _get_library_frame()
         total = len(lib_df)
         total_text = f"Total Songs: {total}"
-        
-        # Process ratings: convert to numeric, drop songs without rating and filter for ratings 1 to 5.
-        if "rating" in lib_df.columns and not lib_df.empty:
-            lib_df["rating"] = pd.to_numeric(lib_df["rating"], errors="coerce")
+
+        # Process ratings: drop songs without rating and filter for ratings 1 to 5.
+        if not lib_df.empty:
             rated_df = lib_df.dropna(subset=["rating"])
             rated_df = rated_df[(rated_df["rating"] >= 1) & (rated_df["rating"] <= 5)]
             rating_counts = rated_df["rating"].value_counts().sort_index().reset_index()
@@ -31,5 +62,26 @@ def register_library_callbacks(app):
             fig.update_layout(xaxis_title="Rating", yaxis_title="Number of Songs")
         else:
             fig = {}
-        lib_data = lib_df.to_dict("records")
-        return total_text, fig, lib_data
+        return total_text, fig
+
+    @app.callback(
+        [dash.Output("library-table", "data"),
+         dash.Output("library-table", "page_count"),
+         dash.Output("library-table", "page_current")],
+        [dash.Input("library-table", "page_current"),
+         dash.Input("library-table", "page_size"),
+         dash.Input("library-table", "sort_by"),
+         dash.Input("library-table", "filter_query")]
+    )
+    def update_library_table(page_current, page_size, sort_by, filter_query):
+        # A new filter or sort order starts on the first page: a narrowed view
+        # may not reach the page that was open.
+        triggered = dash.ctx.triggered_prop_ids
+        if "library-table.filter_query" in triggered or "library-table.sort_by" in triggered:
+            page_current = 0
+            page_output = 0
+        else:
+            page_output = dash.no_update
+        # Only the visible page is sent to the browser.
+        records, page_count = get_library_page(page_current, page_size, sort_by, filter_query)
+        return records, page_count, page_output
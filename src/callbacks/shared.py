@@ -1,156 +1,363 @@
 import datetime
-import re
-from src.database.database import get_playlists, get_library_songs, get_tracks_for_playlist
-
-def _custom_title(name):
-    """A smarter title-casing function to handle names with apostrophes."""
-    # First, fix spacing issues like "o' day" by turning it into "o'day"
-    name = re.sub(r"'\s+(\w)", r"'\1", name)
-    # Then, apply the standard title case
-    return name.title()
-
-def clean_and_split_artists(artist_str):
-    if not isinstance(artist_str, str):
-        return []
-    
-    # Lowercase for uniform processing
-    s = artist_str.lower()
-
-    s = re.sub(r",\s*(jr|sr)\.?\b", r" \1", s, flags=re.IGNORECASE)
-    s = re.sub(r"[\/,&;]|\s+(feat\.?|ft\.?|with|vs\.?)\s+", " and ", s, flags=re.IGNORECASE)
-
-    # Step 3: Now that all connectors are standardized, run the removal patterns.
-    # This will now correctly catch " and her handsome devils" even if the original was "& her..."
-    remove_patterns = [
-        r"\s+and\s+(his|her|the)\s+[\w\s]+", # Simplified and combined pattern
-        r"\bvocal\sby\b",
-        r"\b's\sspacemen\b",
-        r"\bbig\sband\b",
-        r"\s+\b(trio|quartet|quintet|sextet|septet)\b"
-    ]
-
-    for pat in remove_patterns:
-        s = re.sub(pat, "", s, flags=re.IGNORECASE)
-
-    artists = [_custom_title(a.strip()) for a in s.split(" and ") if a.strip()]
-    return artists
+import threading
+import pandas as pd
+from src.database.database import (
+    get_playlists,
+    get_library_songs,
+    get_library_songs_by_ids,
+    get_library_rows,
+    diff_library_texts,
+    get_playlist_signatures,
+    get_playlists_for_tracks,
+    get_tracks_for_playlists,
+    get_database_fingerprint,
+    PLAYLIST_TRACK_COLUMNS,
+    LIBRARY_ROW_COLUMNS,
+)
+from src.database.sets import SetIndex
+from src.database.play_order import PlayOrderIndex
+from src.database.watcher import watch_database
+from src.db.snapshot_cache import load_snapshot, save_snapshot
+from src.db.notes_db import sync_track_artists, get_track_artists
+from src.callbacks.artists import clean_and_split_artists, explode_artists, NORMALIZER_VERSION
+
+def _build_playlist_data(sets):
+    """Dropdown options and the default date range derived from the party sets."""
+    party_set_options = [{"label": meta.name, "value": meta.id} for meta in sets]
+
+    if len(sets):
+        default_start = sets.chronological()[0].date.date().isoformat()
+    else:
+        default_start = None
+    default_end = datetime.datetime.now().date().isoformat()
+    return {
+        "party_set_options": party_set_options,
+        "default_start": default_start,
+        "default_end": default_end,
+    }
+
+
+def _sync_artist_bridge(songs, prune=True):
+    """
+    Update the persistent track_id -> artist table for these library songs
+    (only tracks whose artist string changed are re-parsed) and return it.
+    """
+    sync_track_artists({song["id"]: song.get("artist") for song in songs},
+                       clean_and_split_artists, NORMALIZER_VERSION, prune=prune)
+    return get_track_artists()
+
+
+def _fetch_track_keys(playlist_ids):
+    """
+    Fetch the tracks of these playlists in one query.
+    Returns ({playlist_id: [(artist, title), ...]}, the fetched tracks DataFrame).
+    """
+    all_set_tracks = get_tracks_for_playlists(playlist_ids)
+    track_keys = {pid: [] for pid in playlist_ids}
+    for pid, group in all_set_tracks.groupby("playlist_id", sort=False):
+        track_keys[pid] = [(t["artist"], t["title"]) for t in group[["artist", "title"]].to_dict("records")]
+    return track_keys, all_set_tracks
+
+
+def _build_plays(set_tracks, sets):
+    """
+    The play fact table: one row per track of every party set, in chronological
+    set order, with the set's date and style attached. Repeated text columns
+    are categorical and bpm/duration/rating numeric, so callbacks can filter
+    it with boolean masks instead of querying SQLite.
+    """
+    set_order = {meta.id: i for i, meta in enumerate(sets)}
+    plays = set_tracks.rename(columns={"playlist_id": "set_id"})
+    plays = plays[plays["set_id"].isin(set_order.keys())]
+    plays = (plays.assign(_order=plays["set_id"].map(set_order))
+                  .sort_values(["_order", "position"], kind="stable")
+                  .drop(columns="_order")
+                  .reset_index(drop=True))
+
+    plays["set_date"] = pd.to_datetime(plays["set_id"].map({meta.id: meta.date for meta in sets}))
+    plays["style"] = plays["set_id"].map({meta.id: meta.style for meta in sets}).astype("category")
+    for col in ("artist", "title", "album"):
+        plays[col] = plays[col].astype("category")
+    # Always float: whether a column has missing values must not change its dtype between reloads
+    return plays.astype({col: "float64" for col in ("bpm", "duration", "rating")})
+
+
+def _append_repetition_stats(sets, playlist_track_keys, play_order, repetition_stats):
+    """
+    Add `sets` (SetMeta, chronological), which must come after every set already
+    in play_order, to the play order index and the repetition analysis.
+    """
+    for pl in sets:
+        play_order.append_set(pl.id, playlist_track_keys.get(pl.id, []))
+        pct_first, pct_second, pct_third_plus = play_order.repetition(pl.id)
+        repetition_stats.append({
+            "id": pl.id,
+            "name": pl.name,
+            "date": pl.date,
+            "pct_first": pct_first,
+            "pct_second": pct_second,
+            "pct_third_plus": pct_third_plus
+        })
 
 
 def _initialize_data():
     """
     An expensive function that runs only ONCE when the app starts.
     It queries the database and prepares all the data needed by the callbacks.
+    Later changes to the Mixxx database are folded in by refresh_shared_data().
     """
     print("Initializing shared data... (This should only appear once in your console!)")
 
+    # Fingerprints taken first, so anything written while we work shows up as a change.
+    playlist_signatures = get_playlist_signatures()
+    library_rows = get_library_rows()
+
     # --- 1. Process Playlist Data ---
-    all_playlists = get_playlists()
-    party_sets = [pl for pl in all_playlists if pl.get("date") is not None]
-    playlist_id_to_date = {pl["id"]: pl["date"] for pl in party_sets}
-    party_set_options = sorted(
-        [{"label": pl["name"], "value": pl["id"]} for pl in party_sets],
-        key=lambda x: playlist_id_to_date[x["value"]]
-    )
-
-    if party_sets:
-        earliest_date = min(pl["date"] for pl in party_sets)
-        default_start = earliest_date.date().isoformat()
-    else:
-        default_start = None
-    default_end = datetime.datetime.now().date().isoformat()
+    sets = SetIndex(get_playlists())
+    data = {"sets": sets, **_build_playlist_data(sets)}
 
     # --- 2. Process Full Artist Library ---
-    all_library_songs = get_library_songs()
-    all_library_artists = set()
-    for song in all_library_songs:
-        if song.get('artist'): # Safely handle songs that might not have an artist
-            cleaned_names = clean_and_split_artists(song['artist'])
-            for name in cleaned_names:
-                all_library_artists.add(name)
+    track_artists = _sync_artist_bridge(get_library_songs())
+    all_library_artists = set(track_artists["artist"])
 
     # --- 3. Repetition Analysis (First Time, Second Time, 3+ Times) ---
-    # We must process party_sets in chronological order.
-    # party_sets is already sorted by date because of how we built options? 
-    # Actually, let's ensure it is sorted strictly by date.
-    sorted_party_sets = sorted(party_sets, key=lambda x: x["date"])
-    
-    song_counts = {}  # (artist, title) -> count
+    # We must process party sets in chronological order.
+    sorted_party_sets = sets.chronological()
+    playlist_track_keys, set_tracks = _fetch_track_keys([meta.id for meta in sorted_party_sets])
+
+    play_order = PlayOrderIndex()  # (artist, title) -> ordinals of the sets that played it
     repetition_stats = []
-    playlist_song_history = {}
-
-    for pl in sorted_party_sets:
-        tracks = get_tracks_for_playlist(pl["id"])
-        
-        count_first = 0
-        count_second = 0
-        count_third_plus = 0
-        total_tracks = 0
-        
-        # Track which songs we've seen IN THIS SET to avoid double counting 
-        # (though usually a song appears once per set, but good to be safe id logic changes)
-        # However, the requirement is "songs played", so if it's played twice in a set, it counts twice?
-        # Usually for "first time played", we care about the *track* being new.
-        # Let's iterate through tracks.
-        
-        for track in tracks:
-            key = (track.get("artist"), track.get("title"))
-            current_count = song_counts.get(key, 0)
-            
-            if current_count == 0:
-                count_first += 1
-            elif current_count == 1:
-                count_second += 1
-            else:
-                count_third_plus += 1
-            
-            total_tracks += 1
-            
-        # 2. Second pass: Update global counts and record history for this playlist
-        current_playlist_snapshot = {}
-        for track in tracks:
-            key = (track.get("artist"), track.get("title"))
-            new_count = song_counts.get(key, 0) + 1
-            song_counts[key] = new_count
-            current_playlist_snapshot[key] = new_count
-            
-        playlist_song_history[pl["id"]] = current_playlist_snapshot
-        
-        pct_first = (count_first / total_tracks * 100) if total_tracks > 0 else 0
-        pct_second = (count_second / total_tracks * 100) if total_tracks > 0 else 0
-        pct_third_plus = (count_third_plus / total_tracks * 100) if total_tracks > 0 else 0
-        
-        repetition_stats.append({
-            "id": pl["id"],
-            "name": pl["name"],
-            "date": pl["date"],
-            "pct_first": pct_first,
-            "pct_second": pct_second,
-            "pct_third_plus": pct_third_plus
-        })
+    _append_repetition_stats(sorted_party_sets, playlist_track_keys, play_order, repetition_stats)
 
-    # --- 4. Return a single dictionary with all the prepared data ---
-    return {
-        "party_sets": party_sets,
-        "playlist_id_to_date": playlist_id_to_date,
-        "party_set_options": party_set_options,
-        "default_start": default_start,
-        "default_end": default_end,
+    # --- 4. Play fact table (every track of every set) for the aggregate filters ---
+    plays = _build_plays(set_tracks, sets)
+    plays_exploded = explode_artists(plays, track_artists)
+
+    # --- 5. Return a single dictionary with all the prepared data ---
+    data.update({
+        "plays": plays,
+        "plays_exploded": plays_exploded,
         "all_library_artists": all_library_artists,
+        "track_artists": track_artists,
         "repetition_stats": repetition_stats,
-        "song_counts": song_counts,
-        "playlist_song_history": playlist_song_history
-    }
+        "play_order": play_order,
+        # Bookkeeping for incremental reloads
+        "playlist_track_keys": playlist_track_keys,
+        "playlist_signatures": playlist_signatures,
+        "library_rows": library_rows,
+        "data_version": 1,
+    })
+    return data
+
+def _snapshot_key(fingerprint):
+    # The artist split also depends on the normalization rules: a snapshot made
+    # by another NORMALIZER_VERSION is rebuilt, which re-parses the bridge too.
+    return fingerprint, NORMALIZER_VERSION
+
 
-# This crucial line runs the expensive initialization once and stores the result.
-_shared_data = _initialize_data()
+def _load_or_initialize_data():
+    """
+    Warm start from the on-disk snapshot when the Mixxx database and the artist
+    normalizer have not changed since it was written; otherwise run the full
+    initialization and save a new one.
+    """
+    # Fingerprint first: a write that lands while we compute makes the snapshot stale, never wrong.
+    fingerprint = get_database_fingerprint()
+    data = load_snapshot(_snapshot_key(fingerprint))
+    if data is not None:
+        print("Loaded shared data from snapshot cache.")
+        data["default_end"] = datetime.datetime.now().date().isoformat()
+        return data
+    data = _initialize_data()
+    save_snapshot(_snapshot_key(fingerprint), data)
+    return data
+
+# The expensive initialization runs once, on first use or in the background
+# via warm_shared_data(), so importing this module never touches the database.
+_shared_data = None
+_init_lock = threading.Lock()
+_ready = threading.Event()
+_refresh_lock = threading.Lock()
+_reload_listeners = []
 
 def get_shared_data():
     """
-    This function is now extremely fast. It just returns the data that was
-    already prepared when the app started.
+    Return the data prepared by the initialization. The first call computes it
+    (blocking); afterwards this is just a lookup. Callbacks that must not block
+    should check is_shared_data_ready() first.
     """
+    global _shared_data
+    if _shared_data is None:
+        with _init_lock:
+            if _shared_data is None:
+                _shared_data = _load_or_initialize_data()
+                _ready.set()
     return _shared_data
 
 
+def is_shared_data_ready():
+    return _ready.is_set()
+
+
+def on_shared_data_reload(callback):
+    """Register callback() to run whenever refresh_shared_data() changed the data (e.g. to drop caches)."""
+    _reload_listeners.append(callback)
+    return callback
+
+
+def warm_shared_data():
+    """Start the initialization in a background thread and return immediately."""
+    thread = threading.Thread(target=get_shared_data, name="shared-data-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _refresh_library_artists(data, library_rows):
+    """
+    Update all_library_artists and the track -> artist bridge for library changes,
+    found by comparing every song's row with the last known one. Returns None if
+    nothing changed, else (dirty, retouched): the ids of the added, removed and
+    re-texted songs (the sets playing them are refetched), and of the songs
+    whose texts are unchanged but whose bpm/duration/rating/file path changed.
+    """
+    old_rows = data["library_rows"]
+    added, changed, removed = diff_library_texts(old_rows, library_rows)
+    if not (added or changed or removed):
+        return None
+    retouched = [tid for tid in changed if old_rows[tid][:3] == library_rows[tid][:3]]
+    retexted = [tid for tid in changed if old_rows[tid][:3] != library_rows[tid][:3]]
+    if retexted or removed:
+        # Rows were edited or removed: the artist set has to be rebuilt.
+        data["track_artists"] = _sync_artist_bridge(get_library_songs())
+        data["all_library_artists"] = set(data["track_artists"]["artist"])
+    elif added:
+        new_songs = get_library_songs_by_ids(added)
+        data["track_artists"] = _sync_artist_bridge(new_songs, prune=False)
+        data["all_library_artists"] = data["all_library_artists"].union(
+            *(clean_and_split_artists(song.get("artist")) for song in new_songs))
+    data["library_rows"] = library_rows
+    return added + retexted + removed, retouched
+
+
+def _update_track_values(frame, library_rows, track_ids):
+    """
+    The play rows of `frame` with the non-text library values of these tracks
+    (bpm, duration, rating, file path) taken from library_rows; a copy when
+    anything changed.
+    """
+    rows = frame["track_id"].isin(track_ids)
+    if not rows.any():
+        return frame
+    frame = frame.copy()
+    row_ids = frame.loc[rows, "track_id"]
+    for i, col in enumerate(LIBRARY_ROW_COLUMNS[3:], start=3):
+        values = row_ids.map({tid: library_rows[tid][i] for tid in track_ids})
+        frame.loc[rows, col] = values if col == "file_path" else pd.to_numeric(values, errors="coerce")
+    return frame
+
+
+def _refresh_repetition(data, playlist_signatures, old_sorted_ids, dirty_sets=()):
+    """
+    Refetch the sets whose tracks changed (their playlist signature differs, or
+    they are in dirty_sets because a library song they play was edited) and
+    recount the repetition history from the earliest changed set on.
+    """
+    old_signatures = data["playlist_signatures"]
+    new_sorted = data["sets"].chronological()
+    new_sorted_ids = [meta.id for meta in new_sorted]
+    changed = {pid for pid in new_sorted_ids
+               if pid in dirty_sets or old_signatures.get(pid) != playlist_signatures.get(pid)}
+
+    # Sets before the first difference (same set, same order, same tracks)
+    # keep their history; only the tail from there on is recounted.
+    first_dirty = 0
+    for old_id, new_id in zip(old_sorted_ids, new_sorted_ids):
+        if old_id != new_id or new_id in changed:
+            break
+        first_dirty += 1
+    if first_dirty == len(old_sorted_ids) == len(new_sorted_ids):
+        return None
+
+    # Changed copies; the objects readers may be using are left alone.
+    track_keys = data["playlist_track_keys"] = dict(data["playlist_track_keys"])
+    play_order = data["play_order"] = data["play_order"].copy()
+    repetition_stats = data["repetition_stats"] = data["repetition_stats"][:first_dirty]
+
+    # Roll the play order index back to the unchanged prefix.
+    play_order.truncate(first_dirty)
+    for pid in set(old_sorted_ids) - set(new_sorted_ids):
+        track_keys.pop(pid, None)
+
+    fetched_keys, fetched_tracks = _fetch_track_keys([pid for pid in new_sorted_ids if pid in changed])
+    track_keys.update(fetched_keys)
+    _append_repetition_stats(new_sorted[first_dirty:], track_keys, play_order, repetition_stats)
+    print(f"Recounted repetition stats for {len(new_sorted) - first_dirty} set(s).")
+    return fetched_tracks
+
+
+def _refresh_plays(data, fetched_tracks):
+    """Swap the rows of changed or removed sets in the play fact table for freshly fetched ones."""
+    plays = data["plays"]
+    party_ids = set(data["sets"].by_id)
+    refetched = set(fetched_tracks["playlist_id"]) if fetched_tracks is not None else set()
+    keep = plays[plays["set_id"].isin(party_ids) & ~plays["set_id"].isin(refetched)]
+    kept_tracks = keep.rename(columns={"set_id": "playlist_id"})[PLAYLIST_TRACK_COLUMNS]
+    if fetched_tracks is not None and not fetched_tracks.empty:
+        # Categorical columns from the old table are turned back into plain values before merging.
+        kept_tracks = pd.concat([kept_tracks.astype({c: object for c in ("artist", "title", "album")}),
+                                 fetched_tracks], ignore_index=True)
+    data["plays"] = _build_plays(kept_tracks, data["sets"])
+    data["plays_exploded"] = explode_artists(data["plays"], data["track_artists"])
+
+
+def refresh_shared_data():
+    """
+    Fold changes in the Mixxx database into the shared data.
+    Only new or changed playlists are queried, and repetition history is
+    recomputed from the earliest changed set onwards. Returns True if anything changed.
+    Callbacks may be reading the shared data meanwhile: changed parts are built
+    as new objects in a copy of the dict, which then replaces the shared one
+    in a single assignment.
+    """
+    global _shared_data
+    if not is_shared_data_ready():
+        return False  # the initialization in progress will read the latest state anyway
+    with _refresh_lock:
+        data = dict(_shared_data)
+        fingerprint = get_database_fingerprint()
+        playlist_signatures = get_playlist_signatures()
+        library_rows = get_library_rows()
+
+        library_change = _refresh_library_artists(data, library_rows)
+        dirty_tracks, retouched = library_change or ([], [])
+        # Sets playing an added, removed or re-texted song: their rows and keys change.
+        dirty_sets = set(get_playlists_for_tracks(dirty_tracks)) if dirty_tracks else set()
+        dirty_sets.intersection_update(data["sets"].by_id)
+        playlists_changed = playlist_signatures != data["playlist_signatures"]
+
+        if playlists_changed or dirty_sets:
+            old_sorted_ids = [meta.id for meta in data["sets"]]
+            # Only new or renamed playlists are re-parsed.
+            data["sets"] = SetIndex(get_playlists(), previous=data["sets"])
+            data.update(_build_playlist_data(data["sets"]))
+            fetched_tracks = _refresh_repetition(data, playlist_signatures, old_sorted_ids, dirty_sets)
+            data["playlist_signatures"] = playlist_signatures
+            _refresh_plays(data, fetched_tracks)
+        if retouched:
+            # Ratings, BPMs, durations or file paths edited in Mixxx: only those tracks' play rows change.
+            data["plays"] = _update_track_values(data["plays"], library_rows, retouched)
+            data["plays_exploded"] = _update_track_values(data["plays_exploded"], library_rows, retouched)
+
+        changed = playlists_changed or library_change is not None
+        if changed:
+            data["data_version"] += 1
+            _shared_data = data
+            save_snapshot(_snapshot_key(fingerprint), data)
+            for listener in _reload_listeners:
+                listener()
+        return changed
 
 
+def start_shared_data_watcher():
+    """Reload shared data incrementally whenever Mixxx writes to its database."""
+    return watch_database(refresh_shared_data)
@@ -1,30 +1,23 @@
 import dash
-from dash import dcc, html, dash_table, Input, Output
-import dash_bootstrap_components as dbc
-import pandas as pd
-from src.database.database import get_library_songs
+from dash import Input, Output
+from src.database.search import search_songs, SEARCH_LIMIT
 
 
 def register_songs_callbacks(app):
 
     @app.callback(
-        # Output('results-table', 'data'),
+        [Output('results-table', 'data'),
+         Output('results-count', 'children')],
         Input('search-input', 'value')
     )
     def update_table(search_value):
-        library_songs = get_library_songs()
-        lib_df = pd.DataFrame(library_songs) if library_songs else pd.DataFrame()
-
-        if not search_value:
-            return []
-
-        search_value = search_value.lower()
-
-        filtered_df = lib_df[
-            lib_df['title'].str.lower().str.contains(search_value) |
-            lib_df['artist'].str.lower().str.contains(search_value)
-        ]
-
-        return filtered_df.to_dict('records')
-
-    # **Do NOT return anything from this function itself!**
+        if not search_value or not search_value.strip():
+            return [], ""
+
+        # Ranked prefix/fuzzy matches from the full-text index, at most SEARCH_LIMIT.
+        results = search_songs(search_value, limit=SEARCH_LIMIT)
+        if len(results) == SEARCH_LIMIT:
+            count_text = f"Top {SEARCH_LIMIT} matches"
+        else:
+            count_text = f"{len(results)} match{'es' if len(results) != 1 else ''}"
+        return results, count_text
@@ -0,0 +1,147 @@
+import time
+import random
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from spotipy.exceptions import SpotifyException
+from src.db import get_spotify_tracks, save_spotify_tracks
+
+# --- Spotify track resolution ---
+# (artist, title) -> Spotify track, for exports and the in-table player.
+# Searches run a few at a time, back off when Spotify rate-limits us (HTTP 429,
+# honouring Retry-After) or fails transiently (5xx), and every result is kept in
+# the spotify_tracks table of extra_features.sqlite. The exporter and the player
+# share that cache; entries expire so catalogue changes are eventually seen.
+SEARCH_WORKERS = 4
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+MATCH_TTL = timedelta(days=90)
+MISS_TTL = timedelta(days=7)  # songs not found are retried sooner
+
+
+def track_key(artist, title):
+    """Cache key of a song: stripped, lowercased (artist, title), or None if either is missing."""
+    artist = (artist or "").strip()
+    title = (title or "").strip()
+    if not artist or not title:
+        return None
+    return artist.lower(), title.lower()
+
+
+class SpotifyResolver:
+    """
+    Resolve songs to {"id", "uri"} Spotify matches. `client` is anything with
+    spotipy's search(q=..., type=..., limit=...) signature, so tests can pass a
+    local stub. `sleep` is injectable for the same reason.
+    """
+
+    def __init__(self, client, workers=SEARCH_WORKERS, sleep=time.sleep,
+                 match_ttl=MATCH_TTL, miss_ttl=MISS_TTL):
+        self.client = client
+        self.workers = workers
+        self.sleep = sleep
+        self.match_ttl = match_ttl
+        self.miss_ttl = miss_ttl
+
+    def _backoff(self, error, attempt):
+        retry_after = (getattr(error, "headers", None) or {}).get("Retry-After")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+            except ValueError:
+                pass
+        # Exponential with jitter, so the workers do not retry in lockstep
+        return min(BACKOFF_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+
+    def search(self, artist, title):
+        """One Spotify search, retried on rate limits and server errors. Returns a match or None."""
+        query = f"artist:{artist} track:{title}"
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                results = self.client.search(q=query, type="track", limit=1)
+                break
+            except SpotifyException as e:
+                retriable = e.http_status == 429 or (e.http_status or 0) >= 500
+                if not retriable or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = self._backoff(e, attempt)
+                logging.info(f"Spotify search got HTTP {e.http_status}, retrying in {delay:.1f}s")
+                self.sleep(delay)
+        items = results.get("tracks", {}).get("items", [])
+        if not items:
+            return None
+        return {"id": items[0]["id"], "uri": items[0]["uri"]}
+
+    def resolve(self, songs, progress=None):
+        """
+        Resolve (artist, title) pairs. Returns {track_key: match or None} for every
+        pair with both fields set. Cached keys cost nothing; the rest are searched
+        in the thread pool and stored. progress(done, total) is called as songs resolve.
+        """
+        queries = {}
+        for artist, title in songs:
+            key = track_key(artist, title)
+            if key is not None and key not in queries:
+                queries[key] = (artist.strip(), title.strip())
+
+        cached = get_spotify_tracks(queries, self.match_ttl, self.miss_ttl)
+        results = {key: cached.get(key) for key in queries}
+        missing = [key for key in queries if key not in cached]
+        total = len(results)
+        done = total - len(missing)
+        if progress:
+            progress(done, total)
+
+        found = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self.search, *queries[key]): key for key in missing}
+                for future in as_completed(futures):
+                    key = futures[future]
+                    results[key] = found[key] = future.result()
+                    done += 1
+                    if progress:
+                        progress(done, total)
+        finally:
+            # Keep what was found even if a search failed for good
+            if found:
+                save_spotify_tracks(found)
+        return results
+
+    def resolve_one(self, artist, title):
+        """Match for a single song (or None), from the cache when possible."""
+        key = track_key(artist, title)
+        if key is None:
+            return None
+        return self.resolve([(artist, title)])[key]
+
+
+_prefetching = set()
+_prefetch_lock = threading.Lock()
+
+
+def prefetch_in_background(resolver, name, songs):
+    """
+    Resolve songs in a daemon thread so later lookups hit the cache. `name`
+    identifies the batch (e.g. a playlist id); a batch already being
+    prefetched is not started twice.
+    """
+    with _prefetch_lock:
+        if name in _prefetching:
+            return None
+        _prefetching.add(name)
+
+    def run():
+        try:
+            resolver.resolve(songs)
+        except Exception:
+            logging.warning(f"Prefetching Spotify tracks for {name} failed", exc_info=True)
+        finally:
+            with _prefetch_lock:
+                _prefetching.discard(name)
+
+    thread = threading.Thread(target=run, name=f"spotify-prefetch-{name}", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,103 @@
+import re
+import math
+import pandas as pd
+
+# --- Server-side DataTable queries ---
+# Tables with page_action/sort_action/filter_action="custom" send their state
+# (page_current, page_size, sort_by, filter_query) to the server, which answers
+# with just the visible page. filter_query is the DataTable expression syntax,
+# e.g. '{artist} icontains "basie" && {bpm} >= 120'. With filter_options case
+# set, every operator carries an "i"/"s" prefix, symbols included ('{bpm} i>= 120').
+_TERM = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s+"
+    r"(?P<case>[si]?)(?P<operator>is not blank|is blank|eq|ne|lt|le|gt|ge|contains|datestartswith|>=|<=|!=|=|<|>)"
+    r"\s*(?P<value>.*)$"
+)
+_SYMBOLS = {">=": "ge", "<=": "le", "!=": "ne", "=": "eq", "<": "lt", ">": "gt"}
+_QUOTES = "\"'`"
+
+
+def _parse_value(raw):
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] in _QUOTES and raw[-1] == raw[0]:
+        return raw[1:-1].replace("\\" + raw[0], raw[0])
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def parse_filter_query(filter_query):
+    """
+    Split a DataTable filter_query into (column, operator, value, case_insensitive)
+    terms. Symbolic operators are mapped to their names (">=" -> "ge") and the
+    "i"/"s" case prefix is split off. Terms that cannot be parsed are skipped.
+    """
+    terms = []
+    for part in (filter_query or "").split(" && "):
+        match = _TERM.match(part.strip())
+        if not match:
+            continue
+        operator = _SYMBOLS.get(match["operator"], match["operator"])
+        terms.append((match["column"], operator, _parse_value(match["value"]), match["case"] == "i"))
+    return terms
+
+
+def _term_mask(df, column, operator, value, insensitive):
+    col = df[column]
+    if operator == "is blank":
+        return col.isna() | (col.astype(str) == "")
+    if operator == "is not blank":
+        return col.notna() & (col.astype(str) != "")
+
+    # Numbers compare numerically against numeric columns, everything else as text.
+    if not (isinstance(value, float) and pd.api.types.is_numeric_dtype(col)) or operator in ("contains", "datestartswith"):
+        col = col.astype("string")
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        value = str(value)
+        if insensitive:
+            col = col.str.lower()
+            value = value.lower()
+    if operator == "contains":
+        return col.str.contains(value, regex=False).fillna(False).astype(bool)
+    if operator == "datestartswith":
+        return col.str.startswith(value).fillna(False).astype(bool)
+    comparisons = {
+        "eq": col.__eq__, "ne": col.__ne__,
+        "lt": col.__lt__, "le": col.__le__,
+        "gt": col.__gt__, "ge": col.__ge__,
+    }
+    return comparisons[operator](value).fillna(False).astype(bool)
+
+
+def filter_frame(df, filter_query):
+    """Rows of df matching every term of filter_query (unknown columns are ignored)."""
+    mask = pd.Series(True, index=df.index)
+    for column, operator, value, insensitive in parse_filter_query(filter_query):
+        if column in df.columns:
+            mask &= _term_mask(df, column, operator, value, insensitive)
+    return df[mask]
+
+
+def sort_frame(df, sort_by):
+    """Sort by a DataTable sort_by list; text sorts case-insensitively, blanks last."""
+    sort_by = [s for s in (sort_by or []) if s["column_id"] in df.columns]
+    if not sort_by:
+        return df
+
+    def key(col):
+        return col.str.lower() if col.dtype == object else col
+
+    return df.sort_values([s["column_id"] for s in sort_by],
+                          ascending=[s["direction"] == "asc" for s in sort_by],
+                          key=key, kind="stable", na_position="last")
+
+
+def page_frame(df, page_current, page_size):
+    """(records of the requested page, page_count)."""
+    page_size = page_size or len(df) or 1
+    page_count = max(1, math.ceil(len(df) / page_size))
+    page_current = min(page_current or 0, page_count - 1)
+    start = page_current * page_size
+    return df.iloc[start:start + page_size].to_dict("records"), page_count
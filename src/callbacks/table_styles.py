@@ -0,0 +1,90 @@
+import numpy as np
+
+# --- DataTable conditional styles ---
+# In-cell bars and colour scales for numeric columns, as style_data_conditional
+# rules. The browser checks every rule against every cell, so the rule count is
+# bounded: a column with at most `bins` distinct values gets one exact rule per
+# value, any other column `bins` equal-width range rules (empty ranges are
+# skipped). Colours are computed with NumPy once per rule, never per row.
+STYLE_BINS = 20
+THEME_GOLD = "#CBA135"
+CREAM_RGB = (246, 241, 235)
+GOLD_RGB = (203, 161, 53)
+DARK_TEXT = "#3A3A3A"
+LIGHT_TEXT = "#FFFDF8"
+
+
+def value_bins(values, column_id, bins=STYLE_BINS, floor=None):
+    """
+    Split a column's values into at most `bins` groups. Returns (filter_queries,
+    representative values): the exact value for exact rules, the range midpoint
+    for range rules. Values below `floor` and missing values are left out.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if floor is not None:
+        values = values[values >= floor]
+    distinct = np.unique(values)
+    column = f"{{{column_id}}}"
+    if len(distinct) <= bins:
+        distinct = distinct.tolist()
+        return [f"{column} = {_number(v)}" for v in distinct], np.asarray(distinct)
+
+    edges = np.linspace(distinct[0], distinct[-1], bins + 1)
+    counts, _ = np.histogram(values, edges)
+    edges = edges.tolist()
+    queries, representatives = [], []
+    for i in np.flatnonzero(counts).tolist():
+        low, high = edges[i], edges[i + 1]
+        upper = "<=" if i == bins - 1 else "<"  # the last range includes the maximum
+        queries.append(f"{column} >= {low!r} && {column} {upper} {high!r}")
+        representatives.append((low + high) / 2)
+    return queries, np.asarray(representatives)
+
+
+def _number(value):
+    # 3.0 -> "3", so integer columns get the same query DataTable would write
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def interpolate_colors(positions, start_rgb, end_rgb):
+    """Hex colours at positions (0..1) between two RGB triples, and the RGB sum of each (for text contrast)."""
+    positions = np.clip(np.asarray(positions, dtype=float), 0.0, 1.0)[:, None]
+    start = np.asarray(start_rgb, dtype=float)
+    rgb = (start + (np.asarray(end_rgb, dtype=float) - start) * positions).astype(int)
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb.tolist()], rgb.sum(axis=1)
+
+
+def bar_styles(values, column_id, color=THEME_GOLD, bins=STYLE_BINS, **style):
+    """Rules drawing a horizontal bar in each cell, as long as the value relative to the column maximum."""
+    queries, representatives = value_bins(values, column_id, bins)
+    if not queries:
+        return []
+    max_value = np.nanmax(np.asarray(values, dtype=float))
+    percentages = (representatives / max_value * 100).astype(int) if max_value > 0 else np.zeros(len(queries), int)
+    return [{
+        'if': {'column_id': column_id, 'filter_query': query},
+        'background': f'linear-gradient(90deg, {color} 0%, {color} {pct}%, transparent {pct}%, transparent 100%)',
+        **style
+    } for query, pct in zip(queries, percentages.tolist())]
+
+
+def heatmap_styles(values, column_id, start_rgb=CREAM_RGB, end_rgb=GOLD_RGB, floor=None,
+                   bins=STYLE_BINS, **style):
+    """
+    Rules colouring each cell between start_rgb (lowest value, or `floor`) and
+    end_rgb (highest value). Values below `floor` keep the default cell style.
+    """
+    queries, representatives = value_bins(values, column_id, bins, floor)
+    if not queries:
+        return []
+    low = floor if floor is not None else np.nanmin(np.asarray(values, dtype=float))
+    span = np.nanmax(np.asarray(values, dtype=float)) - low
+    positions = (representatives - low) / span if span > 0 else np.zeros(len(queries))
+    colors, brightness = interpolate_colors(positions, start_rgb, end_rgb)
+    return [{
+        'if': {'column_id': column_id, 'filter_query': query},
+        'backgroundColor': color,
+        'color': LIGHT_TEXT if rgb_sum < 450 else DARK_TEXT,
+        **style
+    } for query, color, rgb_sum in zip(queries, colors, brightness.tolist())]
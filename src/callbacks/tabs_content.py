@@ -1,14 +1,38 @@
 import dash
 from dash import html
-from .tabs_content_layouts import aggregate_layout, crates_layout, individual_layout, library_layout
+import dash_bootstrap_components as dbc
+from .shared import is_shared_data_ready
+from .tabs_content_layouts import aggregate_layout, crates_layout, individual_layout, library_layout, songs_layout
+
+# Tabs whose layout is built from the shared data.
+SHARED_DATA_TABS = {"aggregate", "individual"}
+
+def loading_layout():
+    return html.Div([
+        dbc.Spinner(color="warning"),
+        html.P("Loading your sets from the Mixxx database...", className="mt-2")
+    ], className="text-center my-5")
 
 def register_tabs_callbacks(app):
+    @app.callback(
+        [dash.Output("shared-data-ready", "data"),
+         dash.Output("shared-data-poll", "disabled")],
+        dash.Input("shared-data-poll", "n_intervals")
+    )
+    def poll_shared_data(n_intervals):
+        if not is_shared_data_ready():
+            return dash.no_update, False
+        return True, True
+
     @app.callback(
         dash.Output("tab-content", "children"),
-        dash.Input("tabs", "active_tab")
+        [dash.Input("tabs", "active_tab"),
+         dash.Input("shared-data-ready", "data")]
     )
-    def render_tab_content(active_tab):
+    def render_tab_content(active_tab, shared_data_ready):
         print("Rendering content for tab:", active_tab)
+        if active_tab in SHARED_DATA_TABS and not is_shared_data_ready():
+            return loading_layout()
         if active_tab == "aggregate":
             return aggregate_layout()
         elif active_tab == "crates":
@@ -17,4 +41,6 @@ def register_tabs_callbacks(app):
             return individual_layout()
         elif active_tab == "library":
             return library_layout()
+        elif active_tab == "song_exploration":
+            return songs_layout()
         return html.Div("Tab not found")
@@ -3,6 +3,7 @@ from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 from src.callbacks.shared import get_shared_data
 from dash.dash_table.Format import Format, Scheme #, Trim
+import plotly.io as pio
 def aggregate_layout():
     shared = get_shared_data()
     default_start = shared["default_start"]
@@ -415,6 +416,127 @@ def crates_layout():
             )
         ]),
         html.Hr(),
+        dbc.Row([
+            dbc.Col(html.H4("Crate Overlap", className="mb-0"), width=8),
+            dbc.Col(dbc.Badge(id="crate-multi-count", color="secondary", className="p-2"),
+                    width=4, className="d-flex align-items-center justify-content-end"),
+        ], className="mb-2 align-items-center"),
+        dcc.Graph(id="crate-overlap-heatmap", style={"height": "60vh", "width": "100%", "marginBottom": "20px"}),
+        dbc.Row([
+            dbc.Col(
+                [
+                    html.H4("Crate Coverage"),
+                    dash_table.DataTable(
+                        id="crate-coverage-table",
+                        columns=[
+                            {"name": "Crate Path", "id": "Crate Path"},
+                            {"name": "Songs", "id": "Songs", "type": "numeric"},
+                            {"name": "Only\nHere", "id": "Only Here", "type": "numeric"},
+                            {"name": "Unique %", "id": "Unique %", "type": "numeric"}
+                        ],
+                        data=[],
+                        sort_action="native",
+                        page_size=20,
+                        fixed_rows={'headers': True},
+                        style_cell_conditional=[
+                            {'if': {'column_id': 'Crate Path'}, 'minWidth': '150px', 'width': '55%'},
+                            {'if': {'column_id': 'Songs'}, 'width': '50px', 'textAlign': 'center'},
+                            {'if': {'column_id': 'Only Here'}, 'width': '50px', 'textAlign': 'center'},
+                            {'if': {'column_id': 'Unique %'}, 'width': '50px', 'textAlign': 'center'},
+                        ],
+                        style_table={
+                            'height': '400px',
+                            'overflowY': 'auto',
+                            "border": "1px solid #CBA135",
+                            "boxShadow": "0 2px 6px rgba(0,0,0,0.1)"
+                        },
+                        style_header={
+                            "backgroundColor": "#FFFDF8",
+                            "fontWeight": "bold",
+                            "fontFamily": "Raleway",
+                            "color": "#2C3E50",
+                            'whiteSpace': 'pre-line'
+                        },
+                        style_cell={
+                            'textAlign': 'left',
+                            "fontSize": "14px",
+                            "fontFamily": "Quicksand",
+                            "backgroundColor": "#F6F1EB",
+                            "color": "#3A3A3A",
+                            "padding": "8px",
+                            "border": "none",
+                            'whiteSpace': 'normal',
+                            'overflow': 'hidden',
+                            'textOverflow': 'ellipsis'
+                        }
+                    )
+                ],
+                width=5
+            ),
+            dbc.Col(
+                html.Div([
+                    html.H4("Combine crates"),
+                    dcc.Dropdown(id="crate-set-dropdown", options=[], multi=True, placeholder="Pick crates..."),
+                    dbc.Row([
+                        dbc.Col(dbc.RadioItems(
+                            id="crate-set-mode",
+                            options=[
+                                {"label": "In all selected crates", "value": "intersection"},
+                                {"label": "In any selected crate", "value": "union"},
+                            ],
+                            value="intersection",
+                            inline=True,
+                        )),
+                        dbc.Col(html.Div(id="crate-set-count", className="text-muted text-end"), width=3),
+                    ], className="my-2"),
+                    dash_table.DataTable(
+                        id="crate-set-table",
+                        columns=[
+                            {"name": "Artist", "id": "artist"},
+                            {"name": "Title", "id": "title"},
+                            {"name": "Album", "id": "album"},
+                            {"name": "BPM", "id": "bpm", "type":"numeric", "format":Format(precision=2, scheme=Scheme.decimal_integer)},
+                            {"name": "Rating", "id": "rating"}
+                        ],
+                        data=[],
+                        page_size=50,
+                        fixed_rows={'headers': True},
+                        style_cell_conditional=[
+                            {'if': {'column_id': 'rating'}, 'width': '30px', 'maxWidth': '30px','textAlign': 'center'},
+                            {'if': {'column_id': 'bpm'}, 'width': '40px', 'maxWidth': '50px','textAlign': 'center'},
+                            {'if': {'column_id': 'artist'}, 'minWidth': '100px', 'width': '30%'},
+                            {'if': {'column_id': 'title'}, 'minWidth': '100px', 'width': '35%'},
+                        ],
+                        style_table={
+                            'height': '330px',
+                            'overflowY': 'auto',
+                            "border": "1px solid #CBA135",
+                            "boxShadow": "0 2px 6px rgba(0,0,0,0.1)"
+                        },
+                        style_header={
+                            "backgroundColor": "#FFFDF8",
+                            "fontWeight": "bold",
+                            "fontFamily": "Raleway",
+                            "color": "#2C3E50"
+                        },
+                        style_cell={
+                            'textAlign': 'left',
+                            "fontSize": "14px",
+                            "fontFamily": "Quicksand",
+                            "backgroundColor": "#F6F1EB",
+                            "color": "#3A3A3A",
+                            "padding": "8px",
+                            "border": "none",
+                            'whiteSpace': 'normal',
+                            'overflow': 'hidden',
+                            'textOverflow': 'ellipsis'
+                        }
+                    )
+                ]),
+                width=7
+            )
+        ]),
+        html.Hr(),
         html.H4("Songs not in any crate"),
         dash_table.DataTable(
             id="songs-without-crate-table",
@@ -573,15 +695,19 @@ def individual_layout():
         dbc.Row([
             dbc.Col(dcc.Graph(id="individual-playlist-cumulative-plot"), md=12)
         ], style={"marginBottom": "20px"}),
+        # The selected set as columnar JSON; the table and the plot above are
+        # drawn from it client-side (assets/individual_playlist.js).
+        dcc.Store(id="individual-playlist-store"),
+        dcc.Store(id="individual-plot-template", data=pio.templates[pio.templates.default].to_plotly_json()),
 
        
 
-        # In your individual_layout(), replace the Spotify export section with:
-        dcc.Loading(
-            id="spotify-loading",
-            type="circle",
-            children=html.Div(id="export-spotify-link")
-        ),
+        # The export runs as a background job; progress is polled below.
+        html.Div(id="export-spotify-link"),
+        dbc.Progress(id="export-progress", value=0, striped=True, animated=True, color="success",
+                     className="mt-2", style={"display": "none"}),
+        dcc.Interval(id="export-progress-poll", interval=500, disabled=True),
+        dcc.Store(id="export-job-id"),
         dbc.Button("Export to Spotify", id="export-spotify-btn", color="success", className="mt-3"),
 
 
@@ -633,12 +759,17 @@ def library_layout():
                 {"name": "BPM", "id": "bpm", "type":"numeric", "format":Format(precision=2, scheme=Scheme.decimal_integer)},
                 {"name": "Rating", "id": "rating", "type": "numeric"}
             ],
-            sort_action="native",
-            filter_action="native",
+            # Paging, sorting and filtering run on the server (see library.py),
+            # only the visible page is sent to the browser.
+            page_action="custom",
+            sort_action="custom",
+            filter_action="custom",
             filter_options={"case": "insensitive"},  # Set case-insensitive filtering
+            filter_query="",
+            sort_by=[],
             data=[],
-            virtualization=True,
             fixed_rows={'headers': True},
+            page_current=0,
             page_size=200,
             style_cell_conditional=[
                 {'if': {'column_id': 'rating'}, 'width': '10px', 'maxWidth': '30px','textAlign': 'center'},
@@ -679,22 +810,26 @@ def songs_layout():
     return html.Div([
         html.H2("Songs research"),
         html.H3("Song Search Tool"),
-        # Add crate-related components here.
         html.H4("A tab where I ran research my songs."),
         dcc.Input(
         id='search-input',
         type='text',
-        placeholder='Search by song or artist...',
-        debounce=True,  # triggers update only when user stops typing
+        placeholder='Search by song, artist or album...',
+        debounce=0.3,  # search while typing, once the user pauses for 300 ms
         style={'width': '100%', 'padding': '10px', 'fontSize': '16px'}
-    )
-    # ,dash_table.DataTable(
-    #     id='results-table',
-    # columns=[
-    #         {'name': col, 'id': col} for col in data.columns
-    #     ],
-    #     data=[],
-    #     style_table={'overflowX': 'auto'},
-    #     page_size=10
-    # )
+    ),
+        html.Div(id='results-count', className="text-muted mt-2"),
+        dash_table.DataTable(
+            id='results-table',
+            columns=[
+                {"name": "Title", "id": "title"},
+                {"name": "Artist", "id": "artist"},
+                {"name": "Album", "id": "album"},
+                {"name": "BPM", "id": "bpm", "type":"numeric", "format":Format(precision=2, scheme=Scheme.decimal_integer)},
+                {"name": "Rating", "id": "rating", "type": "numeric"}
+            ],
+            data=[],
+            style_table={'overflowX': 'auto'},
+            page_size=10
+        )
     ])
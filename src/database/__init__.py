@@ -1,9 +1,24 @@
 from .database import (
     get_playlists,
     get_tracks_for_playlist,
+    get_tracks_for_playlists,
     get_crates,
     get_songs_not_in_crates,
     get_library_songs,
+    get_library_texts,
+    get_library_rows,
+    diff_library_texts,
+    get_songs_for_crates,
     format_duration,
-    join_dates
+    format_durations,
+    join_dates,
+    get_connection_stats,
+    get_schema,
+    get_database_fingerprint,
+    close_connections
 )
+from .sets import SetMeta, SetIndex, parse_set_name
+from .search import SongSearchIndex, search_songs
+from .crate_tree import CrateTree, CrateNode, split_crate_name
+from .crate_membership import CrateMembership
+from .play_order import PlayOrderIndex
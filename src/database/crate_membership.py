@@ -0,0 +1,86 @@
+import numpy as np
+
+# --- Crate membership ---
+# Crate -> track memberships built from crate_tracks, kept sparse: one sorted
+# array of track columns per crate, plus the flat (crate row, track column) pairs.
+# Memory grows with the number of memberships, not crates x tracks. Overlaps,
+# coverage and multi-crate intersections/unions are NumPy operations on these
+# arrays instead of SQL joins; the crate x crate overlap is computed once per
+# instance (the crate callbacks cache one instance per database state).
+
+
+class CrateMembership:
+    """
+    `crate_ids` fixes the row order, `crate_tracks` maps crate id -> track ids
+    (get_crate_tracks()). Columns are the sorted distinct track ids.
+    """
+    __slots__ = ("crate_ids", "track_ids", "columns", "_rows", "_member_rows", "_member_columns", "_overlap")
+
+    def __init__(self, crate_ids, crate_tracks):
+        self.crate_ids = list(crate_ids)
+        self._rows = {crate_id: i for i, crate_id in enumerate(self.crate_ids)}
+        members = [np.unique(np.asarray(crate_tracks.get(crate_id, ()), dtype=np.int64)) for crate_id in self.crate_ids]
+        self.track_ids = np.unique(np.concatenate(members)) if members else np.empty(0, dtype=np.int64)
+        # Per crate, the sorted columns (indexes into track_ids) of its tracks
+        self.columns = [np.searchsorted(self.track_ids, tracks).astype(np.int32) for tracks in members]
+        sizes = [len(cols) for cols in self.columns]
+        self._member_rows = np.repeat(np.arange(len(self.crate_ids), dtype=np.int32), sizes)
+        self._member_columns = np.concatenate(self.columns) if self.columns else np.empty(0, dtype=np.int32)
+        self._overlap = None
+
+    def _crate_columns(self, crate_ids):
+        return [self.columns[self._rows[crate_id]] for crate_id in crate_ids if crate_id in self._rows]
+
+    def crate_sizes(self):
+        return np.array([len(cols) for cols in self.columns], dtype=np.int64)
+
+    def crates_per_track(self):
+        """How many crates each track (column) is in."""
+        return np.bincount(self._member_columns, minlength=len(self.track_ids))
+
+    def overlap(self):
+        """Crate x crate matrix of shared track counts (the diagonal is the crate size)."""
+        if self._overlap is None:
+            n = len(self.crate_ids)
+            # Memberships grouped by track; crates sharing a track are neighbours
+            # within its group, so pairs are found by comparing each membership
+            # with the one `offset` places later, for every offset up to the
+            # largest group. Work grows with the pairs found, not with n x n.
+            order = np.argsort(self._member_columns, kind="stable")
+            rows = self._member_rows[order].astype(np.int64)
+            columns = self._member_columns[order]
+            counts = np.bincount(rows * n + rows, minlength=n * n)
+            for offset in range(1, int(self.crates_per_track().max(initial=0))):
+                same_track = columns[offset:] == columns[:-offset]
+                a, b = rows[:-offset][same_track], rows[offset:][same_track]
+                counts += np.bincount(a * n + b, minlength=n * n)
+                counts += np.bincount(b * n + a, minlength=n * n)
+            self._overlap = counts.reshape(n, n)
+            self._overlap.flags.writeable = False
+        return self._overlap
+
+    def unique_counts(self):
+        """Tracks of each crate that are in no other crate."""
+        only_here = self.crates_per_track()[self._member_columns] == 1
+        return np.bincount(self._member_rows[only_here], minlength=len(self.crate_ids))
+
+    def tracks_in_at_least(self, n):
+        """Ids of the tracks that are in n or more crates."""
+        return self.track_ids[self.crates_per_track() >= n]
+
+    def intersection(self, crate_ids):
+        """Ids of the tracks in every one of these crates."""
+        columns = self._crate_columns(crate_ids)
+        if not columns:
+            return self.track_ids[:0]
+        common = columns[0]
+        for cols in columns[1:]:
+            common = np.intersect1d(common, cols, assume_unique=True)
+        return self.track_ids[common]
+
+    def union(self, crate_ids):
+        """Ids of the tracks in any of these crates."""
+        columns = self._crate_columns(crate_ids)
+        if not columns:
+            return self.track_ids[:0]
+        return self.track_ids[np.unique(np.concatenate(columns))]
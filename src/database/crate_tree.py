@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+
+# --- Crate tree ---
+# Crates are organised by name: "Swing - Fast - Shuffle" sits below "Swing - Fast",
+# whether or not a crate of that name exists. The tree is a trie over the
+# "-"-separated name parts, built once from the crate list and memberships.
+PATH_SEPARATOR = "/"  # how paths are joined in chart ids ("Swing/Fast")
+
+
+def split_crate_name(name):
+    """Path parts of a crate name, e.g. "Swing - Fast" -> ("Swing", "Fast"). Empty parts are dropped."""
+    return tuple(p.strip() for p in name.split("-") if p.strip())
+
+
+@dataclass(slots=True, eq=False)
+class CrateNode:
+    path: tuple
+    children: dict = field(default_factory=dict)   # name part -> CrateNode
+    crate_ids: list = field(default_factory=list)  # crates named exactly like this path
+    song_count: int = 0     # songs of every crate at or below this node (a song in two crates counts twice)
+    unique_tracks: int = 0  # distinct tracks at or below this node
+
+    @property
+    def path_id(self):
+        return PATH_SEPARATOR.join(self.path)
+
+    @property
+    def is_leaf(self):
+        return not self.children
+
+
+class CrateTree:
+    """
+    Trie of crates with rolled-up song counts. `crates` are get_crates() rows,
+    `crate_tracks` maps crate id -> track ids (get_crate_tracks()).
+    """
+    __slots__ = ("root", "crates", "crate_counts", "_crate_nodes", "_order")
+
+    def __init__(self, crates, crate_tracks):
+        self.root = CrateNode(())
+        self.crates = list(crates)
+        self.crate_counts = {crate["id"]: len(crate_tracks.get(crate["id"], ())) for crate in self.crates}
+        self._crate_nodes = {}
+        self._order = {crate["id"]: i for i, crate in enumerate(self.crates)}
+        for crate in self.crates:
+            node = self.root
+            for part in split_crate_name(crate["name"]):
+                node = node.children.setdefault(part, CrateNode(node.path + (part,)))
+            node.crate_ids.append(crate["id"])
+            self._crate_nodes[crate["id"]] = node
+        self._roll_up(self.root, crate_tracks)
+
+    def _roll_up(self, node, crate_tracks):
+        """Fill song_count/unique_tracks bottom-up; returns the node's track id set."""
+        tracks = set()
+        node.song_count = 0
+        for crate_id in node.crate_ids:
+            tracks.update(crate_tracks.get(crate_id, ()))
+            node.song_count += self.crate_counts[crate_id]
+        for child in node.children.values():
+            tracks |= self._roll_up(child, crate_tracks)
+            node.song_count += child.song_count
+        node.unique_tracks = len(tracks)
+        return tracks
+
+    def find(self, path):
+        """Node for a path tuple or a "Swing/Fast" path id, or None."""
+        if isinstance(path, str):
+            path = tuple(path.split(PATH_SEPARATOR)) if path else ()
+        node = self.root
+        for part in path:
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def nodes(self):
+        """Every node below the root, parents before children."""
+        stack = list(reversed(self.root.children.values()))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children.values()))
+
+    def crate_path(self, crate_id):
+        return self._crate_nodes[crate_id].path
+
+    def is_leaf_crate(self, crate_id):
+        """True unless another crate is named below this one."""
+        return self._crate_nodes[crate_id].is_leaf
+
+    def crate_ids_under(self, path):
+        """Ids of the crates at or below path, in get_crates() order."""
+        node = self.find(path)
+        if node is None:
+            return []
+        ids = list(node.crate_ids)
+        stack = list(node.children.values())
+        while stack:
+            child = stack.pop()
+            ids.extend(child.crate_ids)
+            stack.extend(child.children.values())
+        return sorted(ids, key=self._order.__getitem__)
@@ -1,7 +1,12 @@
-import re
 import sqlite3
-import datetime
 import os
+import atexit
+import json
+import hashlib
+import pathlib
+import threading
+import pandas as pd
+from .sets import parse_set_name
 
 BASE_DIR = os.path.dirname(os.path.abspath(__name__))
 DB_PATH = r"C:\Users\Alexis\AppData\Local\Mixxx\mixxxdb.sqlite"
@@ -10,194 +15,397 @@ DB_PATH_test= os.path.join(BASE_DIR, 'mixxxdb_subset.sqlite')
 if os.path.isfile(DB_PATH):
     dbpath = DB_PATH
 else: dbpath = DB_PATH_test
-     
-def get_playlists():
-    conn = sqlite3.connect(dbpath)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT id, name FROM Playlists")
-    playlists = cur.fetchall()
-    conn.close()
-
-    result = []
-    date_pattern = re.compile(r'^(\d{1,2}/\d{1,2}/\d{2,4})')
-    for row in playlists:
-        name = row["name"]
-        match = date_pattern.match(name)
-        playlist_date = None
-        if match:
-            date_str = match.group(1)
-            for fmt in ("%m/%d/%Y", "%m/%d/%y"):
-                try:
-                    playlist_date = datetime.datetime.strptime(date_str, fmt)
-                    break
-                except ValueError:
-                    continue
-        result.append({
-            "id": row["id"],
-            "name": name,
-            "date": playlist_date
-        })
-    return result
 
-def get_tracks_for_playlist(playlist_id):
-    conn = sqlite3.connect(dbpath)
+# --- Connection manager ---
+# The dashboard only ever reads the Mixxx database, so every thread keeps one
+# read-only connection open instead of connecting/closing around each query.
+# Connections left behind by finished threads (e.g. the per-request threads of
+# the Flask dev server) are handed over to the next thread that needs one.
+READ_ONLY_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA cache_size = -65536",    # 64 MB page cache (negative = KiB)
+    "PRAGMA temp_store = MEMORY",
+)
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pool = []  # [{"path", "conn", "thread"}] for every open connection
+_pool_generation = 0
+_connection_stats = {"created": 0, "reused": 0}
+
+
+def _open_connection(path):
+    uri = pathlib.Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+    # check_same_thread=False lets close_connections() and connection hand-over
+    # work across threads; a connection is still only used by one thread at a time.
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
     conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    query_with_hidden = """
-        SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating,
-               tl.location as file_path, pt.position
-        FROM PlaylistTracks pt
-        JOIN library lib ON pt.track_id = lib.id
-        JOIN track_locations tl ON lib.location = tl.id
-        WHERE pt.playlist_id = ? AND lib.hidden = 0
-        ORDER BY pt.position
+    for pragma in READ_ONLY_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection():
+    """Return the calling thread's pooled read-only connection to the Mixxx database."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == dbpath and _local.generation == _pool_generation:
+        with _pool_lock:
+            _connection_stats["reused"] += 1
+        return conn
+
+    current = threading.current_thread()
+    with _pool_lock:
+        for entry in _pool:
+            if entry["path"] == dbpath and not entry["thread"].is_alive():
+                entry["thread"] = current
+                conn = entry["conn"]
+                _connection_stats["reused"] += 1
+                break
+        else:
+            conn = _open_connection(dbpath)
+            _pool.append({"path": dbpath, "conn": conn, "thread": current})
+            _connection_stats["created"] += 1
+        _local.conn, _local.path, _local.generation = conn, dbpath, _pool_generation
+    return conn
+
+
+def close_connections():
+    """Close every pooled connection. Threads reopen lazily on their next query."""
+    global _pool_generation
+    with _pool_lock:
+        for entry in _pool:
+            entry["conn"].close()
+        _pool.clear()
+        _pool_generation += 1
+
+
+def get_connection_stats():
+    """Counters showing how often a pooled connection was reused versus newly created."""
+    with _pool_lock:
+        return {**_connection_stats, "open": len(_pool)}
+
+
+atexit.register(close_connections)
+
+
+def _fetchall(query, params=()):
+    return get_connection().execute(query, params).fetchall()
+
+
+# --- Schema capabilities ---
+# Mixxx versions differ in which columns exist (e.g. library.hidden). The schema
+# is introspected per database file and a matching query set is built, so
+# every call is a single statement and a failing query is a real error.
+# When the file or its WAL changes on disk, PRAGMA schema_version tells whether
+# the schema itself changed (e.g. a Mixxx upgrade migrated it); only then is it
+# introspected again. Otherwise the SQL strings stay the same, so sqlite3's
+# per-connection statement cache keeps them prepared.
+SCHEMA_TABLES = ("library", "crates", "crate_tracks", "PlaylistTracks", "track_locations", "Playlists")
+
+_schema_lock = threading.Lock()
+_schema_cache = {}  # absolute db path -> {"columns", "queries", "schema_version", "file_state"}
+
+
+def _file_state():
+    """(suffix, size, mtime) of the database file and its WAL."""
+    parts = []
+    for suffix in ("", "-wal"):
+        try:
+            st = os.stat(dbpath + suffix)
+            parts.append((suffix, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            parts.append((suffix, None, None))
+    return tuple(parts)
+
+
+def get_schema():
+    """Return {table: frozenset(columns)} for the current database, re-introspected when its schema changes."""
+    return _get_schema_entry()["columns"]
+
+
+def _get_schema_entry():
+    key = os.path.abspath(dbpath)
+    file_state = _file_state()
+    entry = _schema_cache.get(key)
+    if entry is None or entry["file_state"] != file_state:
+        with _schema_lock:
+            entry = _schema_cache.get(key)
+            if entry is None or entry["file_state"] != file_state:
+                conn = get_connection()
+                schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+                if entry is None or entry["schema_version"] != schema_version:
+                    columns = {
+                        table: frozenset(row["name"] for row in conn.execute(f"PRAGMA table_info({table})"))
+                        for table in SCHEMA_TABLES
+                    }
+                    entry = {"columns": columns, "queries": _build_queries(columns),
+                             "schema_version": schema_version}
+                else:
+                    entry = dict(entry)
+                entry["file_state"] = file_state
+                _schema_cache[key] = entry
+    return entry
+
+
+def _queries():
+    return _get_schema_entry()["queries"]
+
+
+def get_database_fingerprint():
+    """
+    A string that changes whenever the database file, its WAL or its schema changes.
+    Used to tell whether results computed earlier are still valid.
     """
-    try:
-        cur.execute(query_with_hidden, (playlist_id,))
-    except sqlite3.OperationalError:
-        query_without_hidden = """
+    entry = _get_schema_entry()
+    parts = [os.path.abspath(dbpath), entry["file_state"], entry["schema_version"]]
+    parts.append(sorted((table, sorted(cols)) for table, cols in entry["columns"].items()))
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def _build_queries(columns):
+    has_hidden = "hidden" in columns["library"]
+    hidden = " AND lib.hidden = 0" if has_hidden else ""
+
+    queries = {
+        "playlists": "SELECT id, name FROM Playlists",
+        "tracks_for_playlist": f"""
             SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating,
                    tl.location as file_path, pt.position
             FROM PlaylistTracks pt
             JOIN library lib ON pt.track_id = lib.id
             JOIN track_locations tl ON lib.location = tl.id
-            WHERE pt.playlist_id = ?
+            WHERE pt.playlist_id = ?{hidden}
             ORDER BY pt.position
-        """
-        cur.execute(query_without_hidden, (playlist_id,))
-    tracks = cur.fetchall()
-    conn.close()
-    return [dict(track) for track in tracks]
-
-def get_crates():
-    conn = sqlite3.connect(dbpath)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT id, name FROM crates")
-    crates = cur.fetchall()
-    conn.close()
-    return [dict(crate) for crate in crates]
+        """,
+        # {placeholders} is filled with one "?" per playlist id at call time.
+        "tracks_for_playlists": f"""
+            SELECT pt.playlist_id, pt.position, lib.id as track_id,
+                   lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating,
+                   tl.location as file_path
+            FROM PlaylistTracks pt
+            JOIN library lib ON pt.track_id = lib.id
+            JOIN track_locations tl ON lib.location = tl.id
+            WHERE pt.playlist_id IN ({{placeholders}}){hidden}
+        """,
+        "crates": "SELECT id, name FROM crates",
+        "songs_not_in_crates": f"""
+            SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating
+            FROM library lib
+            LEFT JOIN crate_tracks ct ON lib.id = ct.track_id
+            WHERE ct.track_id IS NULL{hidden}
+        """,
+        "songs_for_crate": f"""
+            SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating
+            FROM crate_tracks ct
+            JOIN library lib ON ct.track_id = lib.id
+            WHERE ct.crate_id = ?{hidden}
+        """,
+        # Distinct songs of several crates at once. The ids are passed as one JSON
+        # array, so any number of crates is a single statement. Tracks sharing an
+        # artist and title are listed once (the lowest id wins).
+        "songs_for_crates": f"""
+            SELECT artist, title, album, bpm, duration, rating FROM (
+                SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating, MIN(lib.id)
+                FROM library lib
+                WHERE lib.id IN (
+                    SELECT ct.track_id FROM crate_tracks ct
+                    WHERE ct.crate_id IN (SELECT value FROM json_each(?))
+                ){hidden}
+                GROUP BY lib.artist, lib.title
+            )
+            ORDER BY artist IS NULL, artist, title IS NULL, title
+        """,
+        "library_songs": "SELECT id, artist, title, album, bpm, rating FROM library"
+                         + (" WHERE hidden = 0" if has_hidden else ""),
+        "library_songs_by_ids": "SELECT id, artist, title, album, bpm, rating FROM library WHERE id IN ({placeholders})",
+        "library_texts": "SELECT id, artist, title, album FROM library"
+                         + (" WHERE hidden = 0" if has_hidden else ""),
+        # Everything a play row takes from the library, per song
+        "library_rows": f"""
+            SELECT lib.id, lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating,
+                   tl.location as file_path
+            FROM library lib
+            LEFT JOIN track_locations tl ON lib.location = tl.id
+            {"WHERE lib.hidden = 0" if has_hidden else ""}
+        """,
+        # Playlists containing any of these track ids (a JSON array).
+        "playlists_for_tracks": """
+            SELECT DISTINCT playlist_id FROM PlaylistTracks
+            WHERE track_id IN (SELECT value FROM json_each(?))
+        """,
+        # The position-weighted track sum changes whenever tracks are added,
+        # removed or reordered, without having to compare track lists.
+        "playlist_signatures": f"""
+            SELECT p.id, p.name,
+                   {"p.date_modified" if "date_modified" in columns["Playlists"] else "NULL"} as date_modified,
+                   COUNT(pt.track_id) as track_count,
+                   COALESCE(SUM(pt.track_id * pt.position), 0) as checksum
+            FROM Playlists p
+            LEFT JOIN PlaylistTracks pt ON pt.playlist_id = p.id
+            GROUP BY p.id
+        """,
+    }
 
-def get_crate_counts():
-    conn = sqlite3.connect(dbpath)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    query_with_hidden = """
-        SELECT c.id, c.name, COUNT(ct.track_id) as count
-        FROM crates c
-        LEFT JOIN crate_tracks ct ON c.id = ct.crate_id
-        LEFT JOIN library lib ON ct.track_id = lib.id
-        WHERE lib.hidden = 0 OR lib.hidden IS NULL
-        GROUP BY c.id
-    """
-    try:
-        cur.execute(query_with_hidden)
-    except sqlite3.OperationalError:
-        query_without_hidden = """
+    if has_hidden:
+        queries["crate_counts"] = """
             SELECT c.id, c.name, COUNT(ct.track_id) as count
             FROM crates c
             LEFT JOIN crate_tracks ct ON c.id = ct.crate_id
+            LEFT JOIN library lib ON ct.track_id = lib.id
+            WHERE lib.hidden = 0 OR lib.hidden IS NULL
             GROUP BY c.id
         """
-        cur.execute(query_without_hidden)
-    counts = cur.fetchall()
-    conn.close()
-    return {row["id"]: row["count"] for row in counts}
-
-def get_all_crates_summary():
-    conn = sqlite3.connect(dbpath)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    query_with_hidden = """
-        SELECT c.id, c.name, 
+        summary_filter = "WHERE (lib.hidden = 0 OR lib.hidden IS NULL)"
+    else:
+        queries["crate_counts"] = """
+            SELECT c.id, c.name, COUNT(ct.track_id) as count
+            FROM crates c
+            LEFT JOIN crate_tracks ct ON c.id = ct.crate_id
+            GROUP BY c.id
+        """
+        summary_filter = ""
+    # Same visibility rule as crate_counts, so len(tracks) matches the crate's count.
+    queries["crate_tracks"] = f"""
+        SELECT ct.crate_id, ct.track_id
+        FROM crate_tracks ct
+        LEFT JOIN library lib ON ct.track_id = lib.id
+        {summary_filter}
+    """
+    queries["all_crates_summary"] = f"""
+        SELECT c.id, c.name,
                COUNT(ct.track_id) as total_songs,
                AVG(lib.bpm) as avg_bpm,
                SUM(lib.duration) as total_duration
         FROM crates c
         LEFT JOIN crate_tracks ct ON c.id = ct.crate_id
         LEFT JOIN library lib ON ct.track_id = lib.id
-        WHERE (lib.hidden = 0 OR lib.hidden IS NULL)
+        {summary_filter}
         GROUP BY c.id
     """
-    try:
-        cur.execute(query_with_hidden)
-    except sqlite3.OperationalError:
-        query_without_hidden = """
-            SELECT c.id, c.name, 
-                   COUNT(ct.track_id) as total_songs,
-                   AVG(lib.bpm) as avg_bpm,
-                   SUM(lib.duration) as total_duration
-            FROM crates c
-            LEFT JOIN crate_tracks ct ON c.id = ct.crate_id
-            LEFT JOIN library lib ON ct.track_id = lib.id
-            GROUP BY c.id
-        """
-        cur.execute(query_without_hidden)
-    summary = cur.fetchall()
-    conn.close()
-    return [dict(row) for row in summary]
+    return queries
 
-def get_songs_not_in_crates():
-    conn = sqlite3.connect(dbpath)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    query_with_hidden = """
-      SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating
-      FROM library lib
-      LEFT JOIN crate_tracks ct ON lib.id = ct.track_id
-      WHERE ct.track_id IS NULL AND lib.hidden = 0
+
+def get_playlists():
+    playlists = _fetchall(_queries()["playlists"])
+    # The date prefix is parsed by the same cached parser that builds SetIndex.
+    return [{"id": row["id"], "name": row["name"], "date": parse_set_name(row["name"])[0]}
+            for row in playlists]
+
+def get_tracks_for_playlist(playlist_id):
+    rows = _fetchall(_queries()["tracks_for_playlist"], (playlist_id,))
+    return [dict(track) for track in rows]
+
+# SQLite builds before 3.32 cap bound parameters at 999 per statement.
+MAX_QUERY_PARAMS = 900
+
+PLAYLIST_TRACK_COLUMNS = ["playlist_id", "position", "track_id", "artist", "title", "album",
+                          "bpm", "duration", "rating", "file_path"]
+
+
+def get_tracks_for_playlists(playlist_ids):
     """
-    try:
-        cur.execute(query_with_hidden)
-    except sqlite3.OperationalError:
-        query_without_hidden = """
-          SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating
-          FROM library lib
-          LEFT JOIN crate_tracks ct ON lib.id = ct.track_id
-          WHERE ct.track_id IS NULL
-        """
-        cur.execute(query_without_hidden)
-    songs = cur.fetchall()
-    conn.close()
-    return [dict(song) for song in songs]
+    Fetch the tracks of many playlists in a single query.
+    Returns a DataFrame with one row per (playlist_id, position), playlists in the
+    order requested, and numeric bpm/duration/rating columns.
+    """
+    playlist_ids = list(dict.fromkeys(playlist_ids))
+    if not playlist_ids:
+        return pd.DataFrame(columns=PLAYLIST_TRACK_COLUMNS)
+
+    frames = []
+    conn = get_connection()
+    query_template = _queries()["tracks_for_playlists"]
+    for start in range(0, len(playlist_ids), MAX_QUERY_PARAMS):
+        chunk = playlist_ids[start:start + MAX_QUERY_PARAMS]
+        query = query_template.format(placeholders=",".join("?" * len(chunk)))
+        frames.append(pd.read_sql_query(query, conn, params=chunk))
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    for col in ("bpm", "duration", "rating"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    order = {pid: i for i, pid in enumerate(playlist_ids)}
+    df["_order"] = df["playlist_id"].map(order)
+    df = df.sort_values(["_order", "position"], kind="stable").drop(columns="_order")
+    return df[PLAYLIST_TRACK_COLUMNS].reset_index(drop=True)
+
+def get_crates():
+    return [dict(crate) for crate in _fetchall(_queries()["crates"])]
+
+def get_crate_counts():
+    counts = _fetchall(_queries()["crate_counts"])
+    return {row["id"]: row["count"] for row in counts}
+
+def get_crate_tracks():
+    """Map crate id -> list of its track ids."""
+    crate_tracks = {}
+    for row in _fetchall(_queries()["crate_tracks"]):
+        crate_tracks.setdefault(row["crate_id"], []).append(row["track_id"])
+    return crate_tracks
+
+def get_all_crates_summary():
+    return [dict(row) for row in _fetchall(_queries()["all_crates_summary"])]
+
+def get_songs_not_in_crates():
+    return [dict(song) for song in _fetchall(_queries()["songs_not_in_crates"])]
 
 def get_songs_for_crate(crate_id):
-    conn = sqlite3.connect(dbpath)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    query_with_hidden = """
-        SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating
-        FROM crate_tracks ct
-        JOIN library lib ON ct.track_id = lib.id
-        WHERE ct.crate_id = ? AND lib.hidden = 0
-    """
-    try:
-        cur.execute(query_with_hidden, (crate_id,))
-    except sqlite3.OperationalError:
-        query_without_hidden = """
-            SELECT lib.artist, lib.title, lib.album, lib.bpm, lib.duration, lib.rating
-            FROM crate_tracks ct
-            JOIN library lib ON ct.track_id = lib.id
-            WHERE ct.crate_id = ?
-        """
-        cur.execute(query_without_hidden, (crate_id,))
-    songs = cur.fetchall()
-    conn.close()
-    return [dict(song) for song in songs]
+    return [dict(song) for song in _fetchall(_queries()["songs_for_crate"], (crate_id,))]
+
+def get_songs_for_crates(crate_ids):
+    """Distinct songs of all these crates in one query, sorted by artist and title."""
+    crate_ids = list(dict.fromkeys(crate_ids))
+    if not crate_ids:
+        return []
+    return [dict(song) for song in _fetchall(_queries()["songs_for_crates"], (json.dumps(crate_ids),))]
 
 def get_library_songs():
-    conn = sqlite3.connect(dbpath)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    query_with_hidden = "SELECT id, artist, title, album, bpm, rating FROM library WHERE hidden = 0"
-    try:
-        cur.execute(query_with_hidden)
-    except sqlite3.OperationalError:
-        cur.execute("SELECT id, artist, title, album, bpm, rating FROM library")
-    songs = cur.fetchall()
-    conn.close()
-    return [dict(song) for song in songs]
+    return [dict(song) for song in _fetchall(_queries()["library_songs"])]
+
+def get_library_songs_by_ids(track_ids):
+    """Library songs with these ids, in the order given (unknown ids are skipped)."""
+    track_ids = list(dict.fromkeys(track_ids))
+    query_template = _queries()["library_songs_by_ids"]
+    by_id = {}
+    for start in range(0, len(track_ids), MAX_QUERY_PARAMS):
+        chunk = track_ids[start:start + MAX_QUERY_PARAMS]
+        for row in _fetchall(query_template.format(placeholders=",".join("?" * len(chunk))), chunk):
+            by_id[row["id"]] = dict(row)
+    return [by_id[tid] for tid in track_ids if tid in by_id]
+
+def get_library_texts():
+    """Map track id -> (artist, title, album) of every visible library song, to diff against later."""
+    return {row["id"]: (row["artist"], row["title"], row["album"]) for row in _fetchall(_queries()["library_texts"])}
+
+# Columns of get_library_rows() tuples; the first three are the texts.
+LIBRARY_ROW_COLUMNS = ("artist", "title", "album", "bpm", "duration", "rating", "file_path")
+
+def get_library_rows():
+    """Map track id -> values of LIBRARY_ROW_COLUMNS of every visible library song, to diff against later."""
+    return {row["id"]: tuple(row[col] for col in LIBRARY_ROW_COLUMNS) for row in _fetchall(_queries()["library_rows"])}
+
+def diff_library_texts(old, new):
+    """
+    Compare two get_library_texts() (or get_library_rows()) results. Returns
+    (added, changed, removed) id lists; an edit of any kind, even one keeping
+    the text length, is a change.
+    """
+    added = [track_id for track_id in new if track_id not in old]
+    changed = [track_id for track_id, texts in old.items() if track_id in new and new[track_id] != texts]
+    removed = [track_id for track_id in old if track_id not in new]
+    return added, changed, removed
+
+def get_playlists_for_tracks(track_ids):
+    """Ids of the playlists that contain any of these tracks."""
+    track_ids = list(dict.fromkeys(track_ids))
+    if not track_ids:
+        return []
+    return [row["playlist_id"] for row in _fetchall(_queries()["playlists_for_tracks"], (json.dumps(track_ids),))]
+
+def get_playlist_signatures():
+    """Map playlist id -> tuple that changes whenever its name or tracks change."""
+    rows = _fetchall(_queries()["playlist_signatures"])
+    return {row["id"]: (row["name"], row["date_modified"], row["track_count"], row["checksum"]) for row in rows}
 
 def format_duration(seconds):
     seconds = int(seconds)
@@ -206,6 +414,16 @@ def format_duration(seconds):
     secs = seconds % 60
     return f"{hrs:02d}:{mins:02d}:{secs:02d}"
 
+def format_durations(seconds):
+    """format_duration for a whole Series at once; missing values become "N/A"."""
+    seconds = pd.to_numeric(seconds, errors="coerce")
+    total = seconds.fillna(0).astype("int64")
+    parts = [total // 3600, (total % 3600) // 60, total % 60]
+    formatted = parts[0].astype(str).str.zfill(2)
+    for part in parts[1:]:
+        formatted = formatted + ":" + part.astype(str).str.zfill(2)
+    return formatted.where(seconds.notna(), "N/A")
+
 def join_dates(x):
     dates = [d.strftime('%Y-%m-%d') for d in x if d is not None]
     return ", ".join(sorted(dates))
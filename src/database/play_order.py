@@ -0,0 +1,110 @@
+import numpy as np
+
+# --- Play order index ---
+# For every (artist, title) key, the sorted ordinals of the sets it was played
+# in (0 = first set chronologically, repeated when a set plays it twice). How
+# often a song had been played before, or up to and including, any set is a
+# binary search, so no per-set snapshot of the play counts is kept.
+# Appending a set costs O(tracks in set); dropping the latest sets again (when
+# an earlier set changed) costs O(tracks in the dropped sets).
+_INITIAL_CAPACITY = 4
+
+
+class PlayOrderIndex:
+    """Play ordinals per song key, for sets appended in chronological order."""
+    __slots__ = ("set_ids", "_ordinal_of", "_set_keys", "_ordinals", "_sizes")
+
+    def __init__(self):
+        self.set_ids = []
+        self._ordinal_of = {}
+        self._set_keys = []  # ordinal -> keys of that set, in play order
+        self._ordinals = {}  # key -> int32 array, filled up to _sizes[key]
+        self._sizes = {}
+
+    def __len__(self):
+        return len(self.set_ids)
+
+    def __contains__(self, set_id):
+        return set_id in self._ordinal_of
+
+    def copy(self):
+        """An independent copy, to change while readers keep using this index."""
+        other = PlayOrderIndex()
+        other.set_ids = list(self.set_ids)
+        other._ordinal_of = dict(self._ordinal_of)
+        other._set_keys = list(self._set_keys)  # the per-set key lists are never changed
+        other._ordinals = {key: ordinals[:self._sizes[key]].copy() for key, ordinals in self._ordinals.items()}
+        other._sizes = dict(self._sizes)
+        return other
+
+    def append_set(self, set_id, keys):
+        """Add the next set in chronological order with its played (artist, title) keys."""
+        ordinal = len(self.set_ids)
+        self.set_ids.append(set_id)
+        self._ordinal_of[set_id] = ordinal
+        self._set_keys.append(list(keys))
+        for key in keys:
+            size = self._sizes.get(key, 0)
+            ordinals = self._ordinals.get(key)
+            if ordinals is None:
+                ordinals = self._ordinals[key] = np.empty(_INITIAL_CAPACITY, dtype=np.int32)
+            elif size == len(ordinals):
+                # Grow by doubling, so appends stay amortised O(1)
+                ordinals = self._ordinals[key] = np.concatenate([ordinals, np.empty(size, dtype=np.int32)])
+            ordinals[size] = ordinal
+            self._sizes[key] = size + 1
+
+    def truncate(self, n_sets):
+        """Forget every set from ordinal n_sets on."""
+        for ordinal in range(len(self.set_ids) - 1, n_sets - 1, -1):
+            for key in self._set_keys[ordinal]:
+                size = self._sizes.get(key)
+                if size is None:
+                    continue  # already cut back by an earlier play of this key
+                size = int(np.searchsorted(self._ordinals[key][:size], n_sets))
+                if size:
+                    self._sizes[key] = size
+                else:
+                    del self._sizes[key], self._ordinals[key]
+            del self._ordinal_of[self.set_ids[ordinal]]
+        del self.set_ids[n_sets:]
+        del self._set_keys[n_sets:]
+
+    def _count(self, key, ordinal, side):
+        size = self._sizes.get(key)
+        if size is None:
+            return 0
+        return int(np.searchsorted(self._ordinals[key][:size], ordinal, side=side))
+
+    def play_count(self, key):
+        """Times this song was played across all sets."""
+        return self._sizes.get(key, 0)
+
+    def plays_before(self, key, set_id):
+        """Times this song was played in the sets before set_id."""
+        return self._count(key, self._ordinal_of[set_id], "left")
+
+    def plays_through(self, key, set_id):
+        """Times this song was played up to and including set_id."""
+        return self._count(key, self._ordinal_of[set_id], "right")
+
+    def set_play_counts(self, set_id):
+        """{key: plays up to and including this set} for the songs of set_id ({} if unknown)."""
+        ordinal = self._ordinal_of.get(set_id)
+        if ordinal is None:
+            return {}
+        return {key: self._count(key, ordinal, "right") for key in self._set_keys[ordinal]}
+
+    def repetition(self, set_id):
+        """
+        Percentages of the tracks of set_id played for the first, second and
+        third or later time. A song played twice in the set counts as new both
+        times: only earlier sets are looked at.
+        """
+        ordinal = self._ordinal_of[set_id]
+        keys = self._set_keys[ordinal]
+        if not keys:
+            return 0, 0, 0
+        before = np.fromiter((self._count(key, ordinal, "left") for key in keys), dtype=np.int64, count=len(keys))
+        first, second, more = np.bincount(np.minimum(before, 2), minlength=3).tolist()
+        return first / len(keys) * 100, second / len(keys) * 100, more / len(keys) * 100
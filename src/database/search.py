@@ -0,0 +1,165 @@
+import re
+import sqlite3
+import difflib
+import threading
+from collections import Counter
+from .database import (
+    get_library_songs_by_ids,
+    get_library_texts,
+    diff_library_texts,
+    get_database_fingerprint,
+)
+
+# --- Song search ---
+# An in-memory SQLite FTS5 index over artist, title and album of the Mixxx
+# library (which we only ever open read-only). Query terms of at least
+# MIN_PREFIX_LENGTH characters match as prefixes (shorter ones would match most
+# of the library). When that finds fewer than `limit` songs, terms not in the
+# index vocabulary are widened to their closest spellings. Results are ranked
+# by bm25, title hits weighing most.
+SEARCH_LIMIT = 100
+MIN_PREFIX_LENGTH = 3
+BM25_WEIGHTS = (2.0, 3.0, 1.0)  # artist, title, album
+FUZZY_MATCHES = 3
+FUZZY_CUTOFF = 0.75
+FUZZY_LENGTH_SLACK = 2  # candidate terms differ in length by at most this much
+FUZZY_CANDIDATES = 50    # terms sharing the most trigrams, compared with difflib
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _trigrams(term):
+    padded = f" {term} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class SongSearchIndex:
+    """
+    Full-text index of the library, one row per track id. sync() brings it up
+    to date with the Mixxx database: added and edited tracks are (re)inserted,
+    removed ones deleted.
+    """
+
+    def __init__(self):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._conn.execute("""
+            CREATE VIRTUAL TABLE songs_fts USING fts5(
+                artist, title, album,
+                tokenize = 'unicode61 remove_diacritics 2', prefix = '3 4'
+            )
+        """)
+        self._conn.execute("CREATE VIRTUAL TABLE songs_vocab USING fts5vocab(songs_fts, row)")
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._texts = None  # track id -> (artist, title, album) as indexed
+        self._trigrams = None  # trigram -> [terms], built on first fuzzy lookup
+        self._fuzzy_cache = {}
+
+    def _insert(self, texts, track_ids):
+        self._conn.executemany(
+            "INSERT INTO songs_fts(rowid, artist, title, album) VALUES (?, ?, ?, ?)",
+            [(track_id, *(text or "" for text in texts[track_id])) for track_id in track_ids],
+        )
+        self._trigrams = None
+        self._fuzzy_cache.clear()
+
+    def sync(self):
+        """Fold library changes into the index. Cheap when the database file did not change."""
+        fingerprint = get_database_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            texts = get_library_texts()
+            if self._texts is None:
+                self._insert(texts, texts)
+            else:
+                # Compared per id, so an edit keeping the text length is seen too
+                added, changed, removed = diff_library_texts(self._texts, texts)
+                stale = changed + removed
+                if stale:
+                    self._conn.executemany("DELETE FROM songs_fts WHERE rowid = ?", [(i,) for i in stale])
+                    self._trigrams = None
+                    self._fuzzy_cache.clear()
+                if added or changed:
+                    self._insert(texts, added + changed)
+            self._conn.commit()
+            self._texts = texts
+            self._fingerprint = fingerprint
+
+    def _load_trigrams(self):
+        trigrams = {}
+        for (term,) in self._conn.execute("SELECT term FROM songs_vocab"):
+            for gram in set(_trigrams(term)):
+                trigrams.setdefault(gram, []).append(term)
+        self._trigrams = trigrams
+        return trigrams
+
+    def _fuzzy_terms(self, token):
+        """
+        Index terms spelled like token. Candidates are the terms of similar
+        length sharing the most trigrams with it; only those go through difflib.
+        """
+        terms = self._fuzzy_cache.get(token)
+        if terms is None:
+            trigrams = self._trigrams or self._load_trigrams()
+            shared = Counter()
+            for gram in set(_trigrams(token)):
+                shared.update(trigrams.get(gram, ()))
+            if token in shared:
+                terms = []
+            else:
+                candidates = [term for term, _ in shared.most_common()
+                              if abs(len(term) - len(token)) <= FUZZY_LENGTH_SLACK][:FUZZY_CANDIDATES]
+                terms = difflib.get_close_matches(token, candidates, n=FUZZY_MATCHES, cutoff=FUZZY_CUTOFF)
+            self._fuzzy_cache[token] = terms
+        return terms
+
+    def _match_expression(self, query, fuzzy):
+        clauses = []
+        for token in _TOKEN.findall(query.lower()):
+            alternatives = [f'"{token}"*' if len(token) >= MIN_PREFIX_LENGTH else f'"{token}"']
+            if fuzzy and len(token) > 3:
+                alternatives += [f'"{term}"' for term in self._fuzzy_terms(token)]
+            clauses.append("(" + " OR ".join(alternatives) + ")")
+        return " AND ".join(clauses)
+
+    def _match(self, expression, limit):
+        rows = self._conn.execute(
+            "SELECT rowid FROM songs_fts WHERE songs_fts MATCH ? "
+            f"ORDER BY bm25(songs_fts, {', '.join(map(str, BM25_WEIGHTS))}) LIMIT ?",
+            (expression, limit),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, query, limit=SEARCH_LIMIT, fuzzy=True):
+        """Track ids matching every word of query, best match first."""
+        self.sync()
+        with self._lock:
+            expression = self._match_expression(query or "", fuzzy=False)
+            if not expression:
+                return []
+            track_ids = self._match(expression, limit)
+            if fuzzy and len(track_ids) < limit:
+                fuzzy_expression = self._match_expression(query, fuzzy=True)
+                if fuzzy_expression != expression:
+                    track_ids = self._match(fuzzy_expression, limit)
+        return track_ids
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """The process-wide song search index, created on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SongSearchIndex()
+    return _index
+
+
+def search_songs(query, limit=SEARCH_LIMIT):
+    """Library songs (id, artist, title, album, bpm, rating) best matching query."""
+    return get_library_songs_by_ids(get_search_index().search(query, limit))
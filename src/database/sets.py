@@ -0,0 +1,108 @@
+import re
+import bisect
+import datetime
+from dataclasses import dataclass
+from functools import lru_cache
+
+# --- Set metadata ---
+# Party sets are Mixxx playlists named "<date> - <style> - <venue / notes>",
+# e.g. "03/14/2024 - Blues - Friday night". Names are parsed once here and the
+# result indexed, so callbacks never split names themselves.
+SET_DATE_PATTERN = re.compile(r'^(\d{1,2}/\d{1,2}/\d{2,4})')
+SET_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y")
+
+
+@dataclass(frozen=True, slots=True)
+class SetMeta:
+    id: int
+    name: str
+    date: datetime.datetime | None
+    style: str          # lowercased second part of the name, "" if missing
+    description: str    # everything after the style (venue, notes), "" if missing
+
+    @property
+    def date_str(self):
+        return self.date.date().isoformat() if self.date else ""
+
+    @property
+    def is_party(self):
+        return self.date is not None
+
+
+@lru_cache(maxsize=4096)
+def parse_set_name(name):
+    """Split a playlist name into (date or None, style, description)."""
+    match = SET_DATE_PATTERN.match(name)
+    set_date = None
+    if match:
+        for fmt in SET_DATE_FORMATS:
+            try:
+                set_date = datetime.datetime.strptime(match.group(1), fmt)
+                break
+            except ValueError:
+                continue
+    parts = [p.strip() for p in name.split(" - ")]
+    style = parts[1].lower() if len(parts) > 1 else ""
+    description = " - ".join(parts[2:])
+    return set_date, style, description
+
+
+class SetIndex:
+    """
+    Parsed metadata of every party set (playlists whose name starts with a
+    date), indexed by id, by style and by date. Iteration and chronological()
+    follow the set dates; sets sharing a date keep the database order.
+    """
+    __slots__ = ("by_id", "by_style", "_chronological", "_dates")
+
+    def __init__(self, playlists=(), previous=None):
+        """
+        Index get_playlists() rows. Sets whose name did not change keep their
+        SetMeta from `previous` (the index being replaced); only new or renamed
+        playlists are parsed. An index is never changed once built, so readers
+        holding it always see a consistent state.
+        """
+        old = previous.by_id if previous is not None else {}
+        self.by_id = {}
+        for pl in playlists:
+            meta = old.get(pl["id"])
+            if meta is None or meta.name != pl["name"]:
+                set_date, style, description = parse_set_name(pl["name"])
+                if set_date is None:
+                    continue
+                meta = SetMeta(pl["id"], pl["name"], set_date, style, description)
+            self.by_id[meta.id] = meta
+
+        self._chronological = sorted(self.by_id.values(), key=lambda m: m.date)
+        self._dates = [m.date for m in self._chronological]
+        self.by_style = {}
+        for meta in self._chronological:
+            self.by_style.setdefault(meta.style, []).append(meta.id)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, set_id):
+        return set_id in self.by_id
+
+    def __iter__(self):
+        return iter(self._chronological)
+
+    def get(self, set_id, default=None):
+        return self.by_id.get(set_id, default)
+
+    def chronological(self):
+        return list(self._chronological)
+
+    def ids_between(self, start=None, end=None):
+        """Ids of the sets dated within [start, end] (either bound optional), chronologically."""
+        lo = bisect.bisect_left(self._dates, start) if start else 0
+        hi = bisect.bisect_right(self._dates, end) if end else len(self._dates)
+        return [meta.id for meta in self._chronological[lo:hi]]
+
+    def select(self, set_ids, styles=None, start=None, end=None):
+        """The given set ids that pass the style and date filters, in the given order."""
+        allowed = set(self.ids_between(start, end))
+        if styles is not None:
+            allowed.intersection_update(pid for style in styles for pid in self.by_style.get(style, ()))
+        return [pid for pid in set_ids if pid in allowed]
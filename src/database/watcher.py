@@ -0,0 +1,63 @@
+import os
+import logging
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from src.database import database
+
+# Mixxx writes through the main file, its WAL or its rollback journal.
+# The -shm file is left out on purpose: our own readers touch it.
+WATCHED_SUFFIXES = ("", "-wal", "-journal")
+# Only events that mean "something was written"; opens and read-only closes
+# (which our own queries cause) are ignored.
+WRITE_EVENTS = {"modified", "created", "moved", "deleted", "closed"}
+
+
+class _DatabaseChangeHandler(FileSystemEventHandler):
+    """Calls on_change once a burst of writes to the database files has settled."""
+
+    def __init__(self, db_path, on_change, debounce):
+        super().__init__()
+        name = os.path.basename(db_path)
+        self.watched = {name + suffix for suffix in WATCHED_SUFFIXES}
+        self.on_change = on_change
+        self.debounce = debounce
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in WRITE_EVENTS:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(os.path.basename(p) in self.watched for p in paths if p):
+            self._schedule()
+
+    def _schedule(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self):
+        try:
+            self.on_change()
+        except Exception:
+            logging.exception("Reloading after a Mixxx database change failed")
+
+
+def watch_database(on_change, db_path=None, debounce=2.0):
+    """
+    Start a background observer that calls on_change() after the Mixxx database
+    (or its WAL) has been written to and stayed quiet for `debounce` seconds.
+    Returns the running observer; call .stop() on it to shut it down.
+    """
+    db_path = os.path.abspath(db_path or database.dbpath)
+    observer = Observer()
+    observer.schedule(_DatabaseChangeHandler(db_path, on_change, debounce),
+                      os.path.dirname(db_path), recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
@@ -1,5 +1,10 @@
 # src/db/__init__.py
 
-from .notes_db import init_db, upsert_note, get_note
+from .notes_db import (init_db, upsert_note, get_note, sync_track_artists, get_track_artists,
+                       get_spotify_tracks, save_spotify_tracks,
+                       create_job, update_job, get_job, touch_jobs, fail_stale_jobs)
+from .snapshot_cache import load_snapshot, save_snapshot
 
-__all__ = ["init_db", "upsert_note","get_note"]
\ No newline at end of file
+__all__ = ["init_db", "upsert_note","get_note", "sync_track_artists", "get_track_artists",
+           "get_spotify_tracks", "save_spotify_tracks", "create_job", "update_job", "get_job",
+           "touch_jobs", "fail_stale_jobs", "load_snapshot", "save_snapshot"]
\ No newline at end of file
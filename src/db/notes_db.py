@@ -1,7 +1,9 @@
 # src/db/notes_db.py
 import os
+import json
 import sqlite3
 from datetime import datetime
+import pandas as pd
 
 
 DB_DIR = os.path.dirname(__file__)  # points to src/cb
@@ -21,6 +23,59 @@ def init_db():
                 date_created DATETIME
             )
         """)
+        # Normalized artist dimension: one row per (track, artist) from the Mixxx
+        # library, plus the raw string/normalizer version each track was parsed from.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS track_artists (
+                track_id INTEGER NOT NULL,
+                artist_order INTEGER NOT NULL,
+                artist TEXT NOT NULL,
+                PRIMARY KEY (track_id, artist_order)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_track_artists_artist ON track_artists (artist)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS track_artist_sources (
+                track_id INTEGER PRIMARY KEY,
+                raw_artist TEXT,
+                normalizer_version INTEGER NOT NULL
+            )
+        """)
+        # Spotify search results per (artist, title), lowercased, so repeat
+        # songs and re-exports do not hit the API again. A NULL spotify_id
+        # records that the search found nothing.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS spotify_tracks (
+                artist TEXT NOT NULL,
+                title TEXT NOT NULL,
+                spotify_id TEXT,
+                uri TEXT,
+                resolved_at DATETIME NOT NULL,
+                PRIMARY KEY (artist, title)
+            )
+        """)
+        # Background jobs (e.g. Spotify exports): status and progress for the UI poller.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT,
+                status TEXT NOT NULL,
+                progress_done INTEGER NOT NULL DEFAULT 0,
+                progress_total INTEGER NOT NULL DEFAULT 0,
+                result_url TEXT,
+                error TEXT,
+                date_created DATETIME,
+                date_modified DATETIME,
+                owner TEXT,
+                heartbeat DATETIME
+            )
+        """)
+        # Job tables created before owner/heartbeat existed get the columns added
+        job_columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("owner TEXT", "heartbeat DATETIME"):
+            if column.split()[0] not in job_columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
         conn.commit()
 def upsert_note(playlist_id, notes, rating):
     conn = sqlite3.connect(DB_PATH)
@@ -62,3 +117,179 @@ def get_note(playlist_id):
         return notes or "", rating or None
     return "", None
 
+
+
+def sync_track_artists(raw_artists, normalize, normalizer_version, prune=True):
+    """
+    Bring the track_artists table up to date with {track_id: raw artist string}.
+    Only tracks whose raw string (or the normalizer version) changed are re-parsed
+    with normalize(raw) -> [names]. With prune, tracks missing from raw_artists
+    are dropped. Returns the number of tracks written or removed.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        stored = {
+            track_id: (raw, version)
+            for track_id, raw, version in conn.execute(
+                "SELECT track_id, raw_artist, normalizer_version FROM track_artist_sources")
+        }
+        changed = [
+            (track_id, raw) for track_id, raw in raw_artists.items()
+            if stored.get(track_id) != (raw, normalizer_version)
+        ]
+        removed = [track_id for track_id in stored if track_id not in raw_artists] if prune else []
+        if not changed and not removed:
+            return 0
+
+        stale = [(track_id,) for track_id, _ in changed] + [(track_id,) for track_id in removed]
+        with conn:
+            conn.executemany("DELETE FROM track_artists WHERE track_id = ?", stale)
+            conn.executemany("DELETE FROM track_artist_sources WHERE track_id = ?", stale)
+            conn.executemany(
+                "INSERT INTO track_artist_sources (track_id, raw_artist, normalizer_version) VALUES (?, ?, ?)",
+                [(track_id, raw, normalizer_version) for track_id, raw in changed]
+            )
+            conn.executemany(
+                "INSERT INTO track_artists (track_id, artist_order, artist) VALUES (?, ?, ?)",
+                [(track_id, order, name)
+                 for track_id, raw in changed
+                 for order, name in enumerate(normalize(raw))]
+            )
+        return len(stale)
+    finally:
+        conn.close()
+
+def get_track_artists():
+    """The whole track -> artist bridge as a DataFrame (track_id, artist), in artist order per track."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return pd.read_sql_query(
+            "SELECT track_id, artist FROM track_artists ORDER BY track_id, artist_order", conn
+        )
+    finally:
+        conn.close()
+
+# SQLite builds before 3.32 cap bound parameters at 999 per statement.
+MAX_QUERY_PARAMS = 900
+
+def get_spotify_tracks(keys, match_ttl, miss_ttl):
+    """
+    Cached Spotify results for these (artist, title) keys: {key: {"id", "uri"} or None
+    when the search found nothing}. Matches older than match_ttl and misses older
+    than miss_ttl (timedeltas) count as unknown; unknown keys are left out.
+    Keys are looked up in chunks of one statement each.
+    """
+    now = datetime.utcnow()
+    match_cutoff = (now - match_ttl).isoformat()
+    miss_cutoff = (now - miss_ttl).isoformat()
+    keys = list(dict.fromkeys(keys))
+    pairs_per_query = MAX_QUERY_PARAMS // 2
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        found = {}
+        for start in range(0, len(keys), pairs_per_query):
+            chunk = keys[start:start + pairs_per_query]
+            # Joined from the wanted keys, so each one is a primary key lookup
+            rows = conn.execute(f"""
+                WITH wanted(artist, title) AS (VALUES {', '.join(['(?, ?)'] * len(chunk))})
+                SELECT st.artist, st.title, st.spotify_id, st.uri, st.resolved_at
+                FROM wanted JOIN spotify_tracks st ON st.artist = wanted.artist AND st.title = wanted.title
+            """, [part for key in chunk for part in key])
+            for artist, title, spotify_id, uri, resolved_at in rows:
+                if spotify_id is not None and resolved_at >= match_cutoff:
+                    found[(artist, title)] = {"id": spotify_id, "uri": uri}
+                elif spotify_id is None and resolved_at >= miss_cutoff:
+                    found[(artist, title)] = None
+        return found
+    finally:
+        conn.close()
+
+def save_spotify_tracks(matches):
+    """Store {(artist, title): {"id", "uri"} or None} search results."""
+    now = datetime.utcnow().isoformat()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO spotify_tracks (artist, title, spotify_id, uri, resolved_at) VALUES (?, ?, ?, ?, ?)",
+                [(artist, title, match["id"] if match else None, match["uri"] if match else None, now)
+                 for (artist, title), match in matches.items()]
+            )
+    finally:
+        conn.close()
+
+JOB_FIELDS = ("job_id", "kind", "params", "status", "progress_done", "progress_total",
+              "result_url", "error", "date_created", "date_modified", "owner", "heartbeat")
+
+def create_job(job_id, kind, params, owner):
+    """Record a new queued job run by `owner` (a process id string); params is stored as JSON."""
+    now = datetime.utcnow().isoformat()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            conn.execute("""
+                INSERT INTO jobs (job_id, kind, params, status, date_created, date_modified, owner, heartbeat)
+                VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)
+            """, (job_id, kind, json.dumps(params), now, now, owner, now))
+    finally:
+        conn.close()
+
+def update_job(job_id, **fields):
+    """Set some of status, progress_done, progress_total, result_url, error. Also counts as a heartbeat."""
+    now = datetime.utcnow().isoformat()
+    fields["date_modified"] = fields["heartbeat"] = now
+    columns = [name for name in fields if name in JOB_FIELDS and name != "job_id"]
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in columns)} WHERE job_id = ?",
+                [fields[name] for name in columns] + [job_id]
+            )
+    finally:
+        conn.close()
+
+def touch_jobs(job_ids):
+    """Refresh the heartbeat of these jobs while they are queued or running."""
+    now = datetime.utcnow().isoformat()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            conn.executemany(
+                "UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND status IN ('queued', 'running')",
+                [(now, job_id) for job_id in job_ids]
+            )
+    finally:
+        conn.close()
+
+def get_job(job_id):
+    """The job row as a dict (params decoded), or None."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    job = dict(zip(JOB_FIELDS, row))
+    job["params"] = json.loads(job["params"]) if job["params"] else {}
+    return job
+
+def fail_stale_jobs(error, stale_before, job_id=None):
+    """
+    Mark queued/running jobs whose last heartbeat is older than stale_before
+    (a datetime) as failed: the process running them is gone. Limited to one
+    job with job_id. Returns the number of jobs failed.
+    """
+    query = ("UPDATE jobs SET status = 'failed', error = ?, date_modified = ? "
+             "WHERE status IN ('queued', 'running') AND (heartbeat IS NULL OR heartbeat < ?)")
+    params = [error, datetime.utcnow().isoformat(), stale_before.isoformat()]
+    if job_id is not None:
+        query += " AND job_id = ?"
+        params.append(job_id)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            return conn.execute(query, params).rowcount
+    finally:
+        conn.close()
@@ -0,0 +1,40 @@
+# src/db/snapshot_cache.py
+import os
+import gzip
+import pickle
+import logging
+
+DB_DIR = os.path.dirname(__file__)
+SNAPSHOT_PATH = os.path.join(DB_DIR, "shared_data_snapshot.pkl.gz")
+# Bump whenever the layout of the shared data changes, so old snapshots are ignored.
+SNAPSHOT_FORMAT = 8
+
+
+def load_snapshot(key):
+    """
+    Return the cached shared data if it was saved under this exact key (the
+    database fingerprint plus anything else the data depends on), else None.
+    """
+    try:
+        with gzip.open(SNAPSHOT_PATH, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logging.warning("Ignoring unreadable shared data snapshot %s", SNAPSHOT_PATH, exc_info=True)
+        return None
+    if snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("key") != key:
+        return None
+    return snapshot["data"]
+
+
+def save_snapshot(key, data):
+    """Write the shared data next to extra_features.sqlite. Failing to write is not fatal."""
+    snapshot = {"format": SNAPSHOT_FORMAT, "key": key, "data": data}
+    tmp_path = SNAPSHOT_PATH + ".tmp"
+    try:
+        with gzip.open(tmp_path, "wb", compresslevel=3) as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, SNAPSHOT_PATH)  # atomic, readers never see half a file
+    except OSError:
+        logging.warning("Could not write shared data snapshot %s", SNAPSHOT_PATH, exc_info=True)
@@ -1,7 +1,7 @@
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
-def get_layout(party_set_options, default_start, default_end):
+def get_layout():
     return dbc.Container([
         html.H2("Mixxx Metadata Dashboard"),
         dbc.Tabs(
@@ -15,5 +15,8 @@ def get_layout(party_set_options, default_start, default_end):
             id="tabs",
             active_tab="aggregate"
         ),
+        # Polls until the shared data has loaded in the background, then stops.
+        dcc.Interval(id="shared-data-poll", interval=500),
+        dcc.Store(id="shared-data-ready", data=False),
         html.Div(id="tab-content")
     ], fluid=True)
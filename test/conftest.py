@@ -0,0 +1,27 @@
+import os
+import sys
+import json
+import tempfile
+
+# The other files in this folder are manual scripts run against a real Mixxx
+# database (test_erase.py even writes to it); pytest must not import them.
+collect_ignore = ["test.py", "test_read.py", "test_erase.py", "copy_db.py"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Tests run in a scratch folder: src.callbacks reads the Spotify settings from
+# ./config.json at import time, and extra_features.sqlite and the shared data
+# snapshot must not be touched.
+WORK_DIR = tempfile.mkdtemp(prefix="mixxx-addon-tests-")
+with open(os.path.join(WORK_DIR, "config.json"), "w") as f:
+    json.dump({"spotify": {"client_id": "test", "client_secret": "test", "redirect_uri": "http://localhost/",
+                           "usr_name": "test"}}, f)
+os.chdir(WORK_DIR)
+
+import src.db.notes_db as notes_db  # noqa: E402
+import src.db.snapshot_cache as snapshot_cache  # noqa: E402
+
+notes_db.DB_PATH = os.path.join(WORK_DIR, "extra_features.sqlite")
+notes_db.init_db()
+snapshot_cache.SNAPSHOT_PATH = os.path.join(WORK_DIR, "shared_data_snapshot.pkl.gz")
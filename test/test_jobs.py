@@ -0,0 +1,124 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import src.db.notes_db as notes_db
+from src.callbacks.jobs import JobQueue, InlineExecutor, INTERRUPTED_ERROR
+
+
+class DeferredExecutor:
+    """Executor stand-in that holds submitted jobs until run_all(), so the queued state can be seen."""
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.pending.append((fn, args, kwargs))
+
+    def run_all(self):
+        while self.pending:
+            fn, args, kwargs = self.pending.pop(0)
+            fn(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def empty_jobs():
+    conn = sqlite3.connect(notes_db.DB_PATH)
+    with conn:
+        conn.execute("DELETE FROM jobs")
+    conn.close()
+
+
+def _queue(executor=None):
+    return JobQueue(executor=executor or InlineExecutor(), heartbeat_interval=None)
+
+
+def _set_heartbeat(job_id, when):
+    conn = sqlite3.connect(notes_db.DB_PATH)
+    with conn:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ?", (when.isoformat(), job_id))
+    conn.close()
+
+
+def _foreign_job(job_id, status, heartbeat):
+    # A job of another worker process sharing the jobs table
+    notes_db.create_job(job_id, "spotify_export", {}, "other-host:4242")
+    notes_db.update_job(job_id, status=status)
+    _set_heartbeat(job_id, heartbeat)
+
+
+def test_job_goes_from_queued_to_running_to_done():
+    executor = DeferredExecutor()
+    queue = _queue(executor)
+    seen = []
+
+    def export(progress, playlist_id):
+        seen.append(queue.get(job_id)["status"])
+        progress(1, 2)
+        progress(2, 2)
+        return f"https://open.spotify.com/playlist/{playlist_id}"
+
+    queue.register("spotify_export", export)
+    job_id = queue.submit("spotify_export", playlist_id=7)
+    job = queue.get(job_id)
+    assert job["status"] == "queued"
+    assert job["params"] == {"playlist_id": 7}
+    assert job["owner"] == queue.owner
+
+    executor.run_all()
+    job = queue.get(job_id)
+    assert seen == ["running"]
+    assert job["status"] == "done"
+    assert job["result_url"] == "https://open.spotify.com/playlist/7"
+    assert (job["progress_done"], job["progress_total"]) == (2, 2)
+    assert queue._active == set()
+
+
+def test_failing_job_records_the_error():
+    queue = _queue()
+
+    def export(progress):
+        raise RuntimeError("Spotify is down")
+
+    queue.register("spotify_export", export)
+    job = queue.get(queue.submit("spotify_export"))
+    assert job["status"] == "failed"
+    assert job["error"] == "Spotify is down"
+    assert job["result_url"] is None
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        _queue().submit("nope")
+
+
+def test_jobs_of_live_workers_are_left_alone():
+    _foreign_job("live", "running", datetime.utcnow())
+    queue = _queue()
+    queue.register("spotify_export", lambda progress: "url")
+    queue.submit("spotify_export")
+
+    assert queue.fail_stale() == 0
+    assert queue.get("live")["status"] == "running"
+
+
+def test_jobs_with_a_stale_heartbeat_are_failed():
+    _foreign_job("gone", "running", datetime.utcnow() - timedelta(minutes=5))
+    _foreign_job("done-long-ago", "done", datetime.utcnow() - timedelta(minutes=5))
+
+    job = _queue().get("gone")
+    assert job["status"] == "failed"
+    assert job["error"] == INTERRUPTED_ERROR
+    assert notes_db.get_job("done-long-ago")["status"] == "done"
+
+
+def test_heartbeat_keeps_a_queued_job_alive():
+    executor = DeferredExecutor()
+    queue = _queue(executor)
+    queue.register("spotify_export", lambda progress: "url")
+    job_id = queue.submit("spotify_export")
+    _set_heartbeat(job_id, datetime.utcnow() - timedelta(minutes=5))
+
+    queue.heartbeat()
+    assert queue.get(job_id)["status"] == "queued"
+    executor.run_all()
+    assert queue.get(job_id)["status"] == "done"
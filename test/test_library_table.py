@@ -0,0 +1,40 @@
+import dash
+import pytest
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from src.callbacks import library
+
+
+@pytest.fixture
+def update_library_table(monkeypatch):
+    pages = []
+
+    def get_library_page(page_current, page_size, sort_by, filter_query):
+        pages.append(page_current)
+        return [{"title": "Song"}], 3
+
+    monkeypatch.setattr(library, "get_library_page", get_library_page)
+    app = dash.Dash(__name__)
+    library.register_library_callbacks(app)
+    callback = next(entry["callback"] for key, entry in app.callback_map.items() if "library-table.data" in key)
+
+    def call(triggered_prop, page_current):
+        context_value.set(AttributeDict(triggered_inputs=[{"prop_id": triggered_prop, "value": None}]))
+        result = callback.__wrapped__(page_current, 10, [], '{bpm} > 100')
+        return result, pages[-1]
+
+    return call
+
+
+@pytest.mark.parametrize("prop", ["library-table.filter_query", "library-table.sort_by"])
+def test_new_filter_or_sort_starts_on_the_first_page(update_library_table, prop):
+    (records, page_count, page_current), fetched = update_library_table(prop, 5)
+    assert fetched == 0
+    assert page_current == 0
+    assert (records, page_count) == ([{"title": "Song"}], 3)
+
+
+def test_paging_keeps_the_page(update_library_table):
+    (_, _, page_current), fetched = update_library_table("library-table.page_current", 2)
+    assert fetched == 2
+    assert page_current is dash.no_update
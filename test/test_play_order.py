@@ -0,0 +1,88 @@
+import pytest
+from src.database.play_order import PlayOrderIndex
+
+A, B, C = ("Artist A", "Song A"), ("Artist B", "Song B"), ("Artist C", "Song C")
+
+SETS = [
+    (10, [A, B]),
+    (11, [A, C, C]),
+    (12, [B]),
+    (13, [A, B, C]),
+]
+
+
+def _index(sets=SETS):
+    index = PlayOrderIndex()
+    for set_id, keys in sets:
+        index.append_set(set_id, keys)
+    return index
+
+
+def _state(index):
+    return ([(set_id, index.set_play_counts(set_id), index.repetition(set_id)) for set_id in index.set_ids],
+            {key: index.play_count(key) for key in (A, B, C)})
+
+
+def test_counts_plays_before_and_through_each_set():
+    index = _index()
+    assert len(index) == 4 and 12 in index and 99 not in index
+    assert index.play_count(A) == 3
+    assert index.play_count(C) == 3
+    assert index.play_count(("Nobody", "Nothing")) == 0
+    assert index.plays_before(A, 10) == 0
+    assert index.plays_through(A, 10) == 1
+    assert index.plays_before(A, 13) == 2
+    assert index.plays_through(C, 11) == 2
+
+
+def test_set_play_counts_include_the_set_itself():
+    index = _index()
+    assert index.set_play_counts(11) == {A: 2, C: 2}
+    assert index.set_play_counts(13) == {A: 3, B: 3, C: 3}
+    assert index.set_play_counts(99) == {}
+
+
+def test_repetition_only_looks_at_earlier_sets():
+    index = _index()
+    assert index.repetition(10) == (100, 0, 0)
+    # C twice in set 11 is new both times; A was played once before
+    assert index.repetition(11) == pytest.approx((200 / 3, 100 / 3, 0))
+    assert index.repetition(12) == (0, 100, 0)
+    assert index.repetition(13) == (0, 0, 100)
+    index.append_set(14, [])
+    assert index.repetition(14) == (0, 0, 0)
+
+
+def test_truncate_then_append_matches_a_fresh_build():
+    index = _index()
+    index.truncate(1)
+    assert index.set_ids == [10]
+    assert 11 not in index
+    assert index.play_count(C) == 0
+    for set_id, keys in SETS[1:]:
+        index.append_set(set_id, keys)
+    assert _state(index) == _state(_index())
+
+    index.truncate(0)
+    assert len(index) == 0
+    assert index.play_count(A) == 0
+
+
+def test_appends_grow_past_the_initial_capacity():
+    sets = [(set_id, [A]) for set_id in range(20)]
+    index = _index(sets)
+    assert index.play_count(A) == 20
+    assert index.plays_before(A, 17) == 17
+    index.truncate(5)
+    assert index.play_count(A) == 5
+
+
+def test_copy_is_independent():
+    index = _index()
+    before = _state(index)
+    copy = index.copy()
+    copy.truncate(1)
+    copy.append_set(20, [C])
+    assert _state(index) == before
+    assert copy.set_ids == [10, 20]
+    assert copy.set_play_counts(20) == {C: 1}
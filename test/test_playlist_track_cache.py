@@ -0,0 +1,40 @@
+import threading
+import time
+import pytest
+from src.callbacks import individual
+from src.callbacks.cache import LRUCache
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+
+    def get_tracks_for_playlist(playlist_id):
+        calls.append(playlist_id)
+        time.sleep(0.05)  # long enough for the other callbacks to pile up on the lock
+        return [{"title": f"Song {playlist_id}", "bpm": 120}]
+
+    monkeypatch.setattr(individual, "_playlist_track_cache", LRUCache(maxsize=4))
+    monkeypatch.setattr(individual, "get_tracks_for_playlist", get_tracks_for_playlist)
+    monkeypatch.setattr(individual, "get_database_fingerprint", lambda: "fingerprint")
+    return calls
+
+
+def test_sibling_callbacks_share_one_fetch(fetches):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(individual.get_playlist_tracks(7))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetches == [7]
+    assert results == [[{"title": "Song 7", "bpm": 120}]] * 6
+    stats = individual.get_playlist_track_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (5, 1)
+
+
+def test_callers_get_their_own_copies(fetches):
+    individual.get_playlist_tracks(7)[0]["bpm"] = "edited"
+    assert individual.get_playlist_tracks(7) == [{"title": "Song 7", "bpm": 120}]
+    assert fetches == [7]
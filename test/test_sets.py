@@ -0,0 +1,63 @@
+import datetime
+from src.database.sets import SetIndex, SetMeta, parse_set_name
+
+PLAYLISTS = [
+    {"id": 1, "name": "03/14/2024 - Blues - Friday night"},
+    {"id": 2, "name": "01/05/24 - Lindy - Social - Main room"},
+    {"id": 3, "name": "Auto DJ"},
+    {"id": 4, "name": "03/14/2024 - Lindy - Late"},
+    {"id": 5, "name": "02/01/2024"},
+]
+
+
+def test_parse_set_name():
+    assert parse_set_name("01/05/24 - Lindy - Social - Main room") == (
+        datetime.datetime(2024, 1, 5), "lindy", "Social - Main room")
+    assert parse_set_name("02/01/2024") == (datetime.datetime(2024, 2, 1), "", "")
+    assert parse_set_name("Auto DJ")[0] is None
+
+
+def test_only_party_sets_are_indexed_in_date_order():
+    index = SetIndex(PLAYLISTS)
+    assert len(index) == 4
+    assert 3 not in index
+    # Sets sharing a date keep the database order
+    assert [meta.id for meta in index] == [2, 5, 1, 4]
+    assert [meta.id for meta in index.chronological()] == [2, 5, 1, 4]
+    assert index.by_style == {"lindy": [2, 4], "": [5], "blues": [1]}
+    assert index.get(1).date_str == "2024-03-14"
+    assert index.get(3) is None
+
+
+def test_ids_between_includes_both_bounds():
+    index = SetIndex(PLAYLISTS)
+    assert index.ids_between(datetime.datetime(2024, 2, 1), datetime.datetime(2024, 3, 14)) == [5, 1, 4]
+    assert index.ids_between(end=datetime.datetime(2024, 2, 1)) == [2, 5]
+    assert index.ids_between() == [2, 5, 1, 4]
+
+
+def test_select_keeps_the_given_order():
+    index = SetIndex(PLAYLISTS)
+    assert index.select([4, 3, 1, 2]) == [4, 1, 2]
+    assert index.select([4, 1, 2], start=datetime.datetime(2024, 3, 1)) == [4, 1]
+
+
+def test_select_by_style():
+    index = SetIndex(PLAYLISTS)
+    assert index.select([1, 2, 4, 5], styles=None) == [1, 2, 4, 5]
+    assert index.select([1, 2, 4, 5], styles=["lindy"]) == [2, 4]
+    assert index.select([1, 2, 4, 5], styles=["lindy", "blues"], end=datetime.datetime(2024, 2, 28)) == [2]
+    assert index.select([1, 2, 4, 5], styles=["waltz"]) == []
+    # An empty style list matches nothing, unlike no style filter at all
+    assert index.select([1, 2, 4, 5], styles=[]) == []
+
+
+def test_rebuild_reuses_unchanged_sets():
+    old = SetIndex(PLAYLISTS)
+    renamed = [dict(pl, name="03/14/2024 - Balboa - Late") if pl["id"] == 4 else pl for pl in PLAYLISTS]
+    new = SetIndex(renamed[1:], previous=old)
+
+    assert new.get(2) is old.get(2)
+    assert new.get(4) == SetMeta(4, "03/14/2024 - Balboa - Late", datetime.datetime(2024, 3, 14), "balboa", "Late")
+    assert 1 not in new
+    assert old.get(4).style == "lindy" and 1 in old
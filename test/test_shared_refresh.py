@@ -0,0 +1,176 @@
+import sqlite3
+import pytest
+from pandas.testing import assert_frame_equal
+import src.database.database as database
+from src.callbacks import shared
+
+# A small Mixxx database: five songs, four party sets and one other playlist.
+MIXXX_SCHEMA = """
+    CREATE TABLE track_locations (id INTEGER PRIMARY KEY, location TEXT);
+    CREATE TABLE library (id INTEGER PRIMARY KEY, artist TEXT, title TEXT, album TEXT, bpm REAL,
+                          duration REAL, rating INTEGER, location INTEGER, hidden INTEGER DEFAULT 0);
+    CREATE TABLE Playlists (id INTEGER PRIMARY KEY, name TEXT, date_modified DATETIME);
+    CREATE TABLE PlaylistTracks (id INTEGER PRIMARY KEY, playlist_id INTEGER, track_id INTEGER, position INTEGER);
+    CREATE TABLE crates (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE crate_tracks (crate_id INTEGER, track_id INTEGER);
+"""
+SONGS = [
+    (1, "Count Basie and His Orchestra", "Jumpin' at the Woodside", "Swingsation", 230, 190, 5),
+    (2, "Ella Fitzgerald & Louis Armstrong", "Cheek to Cheek", "Ella and Louis", 120, 355, 4),
+    (3, "Etta James", "At Last", "At Last!", 90, 182, 3),
+    (4, "Muddy Waters", "Hoochie Coochie Man", None, 78, 170, 3),
+    (5, "Slim Gaillard", "Flat Foot Floogie", "Laughing in Rhythm", 180, 160, None),
+]
+PLAYLISTS = {
+    1: ("01/05/2024 - Lindy - Friday", [1, 2, 5]),
+    2: ("02/10/2024 - Blues - Basement", [3, 4, 3]),
+    3: ("03/15/2024 - Lindy - Social", [1, 5, 2]),
+    4: ("04/20/2024 - Blues - Late night", [4, 3]),
+    5: ("Auto DJ", [1, 2, 3]),
+}
+FRAMES = ("plays", "plays_exploded", "track_artists")
+VALUES = ("repetition_stats", "all_library_artists", "party_set_options", "default_start", "playlist_track_keys")
+
+
+@pytest.fixture
+def mixxx_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "mixxxdb.sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript(MIXXX_SCHEMA)
+    conn.executemany("INSERT INTO track_locations VALUES (?, ?)",
+                     [(song[0], f"/music/{song[0]}.mp3") for song in SONGS])
+    conn.executemany("INSERT INTO library (id, artist, title, album, bpm, duration, rating, location) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [song + (song[0],) for song in SONGS])
+    for pid, (name, track_ids) in PLAYLISTS.items():
+        _add_playlist(conn, pid, name, track_ids)
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "dbpath", path)
+    monkeypatch.setattr(shared, "_shared_data", None)
+    shared._ready.clear()
+    shared.get_shared_data()
+    yield path
+    shared._ready.clear()
+    database.close_connections()
+
+
+def _add_playlist(conn, pid, name, track_ids):
+    conn.execute("INSERT INTO Playlists (id, name) VALUES (?, ?)", (pid, name))
+    conn.executemany("INSERT INTO PlaylistTracks (playlist_id, track_id, position) VALUES (?, ?, ?)",
+                     [(pid, track_id, position) for position, track_id in enumerate(track_ids, start=1)])
+
+
+def _write(path, *statements):
+    conn = sqlite3.connect(path)
+    with conn:
+        for statement, params in statements:
+            conn.execute(statement, params)
+    conn.close()
+
+
+def _assert_matches_full_rebuild():
+    refreshed = shared.get_shared_data()
+    full = shared._initialize_data()
+    for key in FRAMES:
+        assert_frame_equal(refreshed[key], full[key], obj=key)
+    for key in VALUES:
+        assert refreshed[key] == full[key], key
+    assert refreshed["sets"].by_id == full["sets"].by_id
+    assert [meta.id for meta in refreshed["sets"]] == [meta.id for meta in full["sets"]]
+    play_order, full_play_order = refreshed["play_order"], full["play_order"]
+    assert play_order.set_ids == full_play_order.set_ids
+    for set_id in full_play_order.set_ids:
+        assert play_order.set_play_counts(set_id) == full_play_order.set_play_counts(set_id)
+        assert play_order.repetition(set_id) == full_play_order.repetition(set_id)
+
+
+EDITS = {
+    "append latest set": [
+        ("INSERT INTO Playlists (id, name) VALUES (6, '05/01/2024 - Lindy - Outdoor')", ()),
+        ("INSERT INTO PlaylistTracks (playlist_id, track_id, position) VALUES (6, 2, 1), (6, 3, 2)", ()),
+    ],
+    "insert earlier set": [
+        ("INSERT INTO Playlists (id, name) VALUES (6, '01/20/2024 - Blues - Early')", ()),
+        ("INSERT INTO PlaylistTracks (playlist_id, track_id, position) VALUES (6, 4, 1), (6, 1, 2)", ()),
+    ],
+    "edit set tracks": [
+        ("UPDATE PlaylistTracks SET track_id = 4 WHERE playlist_id = 1 AND position = 2", ()),
+    ],
+    "rename set": [
+        ("UPDATE Playlists SET name = '02/10/2024 - Lindy - Basement' WHERE id = 2", ()),
+    ],
+    "delete set": [
+        ("DELETE FROM PlaylistTracks WHERE playlist_id = ?", (2,)),
+        ("DELETE FROM Playlists WHERE id = ?", (2,)),
+    ],
+    "edit played artist": [
+        ("UPDATE library SET artist = 'Etta James & Friends' WHERE id = ?", (3,)),
+    ],
+    "same-length title edit": [
+        ("UPDATE library SET title = 'At Lass' WHERE id = ?", (3,)),
+    ],
+    "edit rating": [
+        ("UPDATE library SET rating = 1 WHERE id = ?", (1,)),
+    ],
+    "edit bpm and duration": [
+        ("UPDATE library SET bpm = 95, duration = 200 WHERE id = ?", (3,)),
+    ],
+    "move file": [
+        ("UPDATE track_locations SET location = '/moved/4.mp3' WHERE id = ?", (4,)),
+    ],
+    "hide played song": [
+        ("UPDATE library SET hidden = 1 WHERE id = ?", (5,)),
+    ],
+    "append library song": [
+        ("INSERT INTO track_locations VALUES (6, '/music/6.mp3')", ()),
+        ("INSERT INTO library (id, artist, title, bpm, location) VALUES (6, 'Big Joe Turner', 'Flip Flop and Fly', "
+         "150, 6)", ()),
+    ],
+}
+
+
+@pytest.mark.parametrize("edit", EDITS)
+def test_refresh_matches_a_full_rebuild(mixxx_db, edit):
+    version = shared.get_shared_data()["data_version"]
+    _write(mixxx_db, *EDITS[edit])
+    assert shared.refresh_shared_data()
+    assert shared.get_shared_data()["data_version"] == version + 1
+    _assert_matches_full_rebuild()
+
+
+def test_refresh_without_changes(mixxx_db):
+    data = shared.get_shared_data()
+    assert not shared.refresh_shared_data()
+    assert shared.get_shared_data() is data
+
+
+def test_refresh_keeps_earlier_data_intact(mixxx_db):
+    old = shared.get_shared_data()
+    old_sets, old_artists = old["sets"], set(old["all_library_artists"])
+    old_counts = old["play_order"].set_play_counts(4)
+    _write(mixxx_db, ("UPDATE library SET rating = 1, artist = 'Muddy Waters Band' WHERE id = ?", (4,)),
+           ("DELETE FROM Playlists WHERE id = ?", (1,)))
+    assert shared.refresh_shared_data()
+
+    new = shared.get_shared_data()
+    assert new is not old and new["sets"] is not old_sets
+    assert 1 in old["sets"] and 1 not in new["sets"]
+    assert old["all_library_artists"] == old_artists
+    assert old["play_order"].set_play_counts(4) == old_counts
+    assert (old["plays"].loc[old["plays"]["track_id"] == 4, "rating"] == 3).all()
+    assert (new["plays"].loc[new["plays"]["track_id"] == 4, "rating"] == 1).all()
+
+
+def test_library_edit_refetches_only_the_sets_playing_it(mixxx_db, monkeypatch):
+    fetched = []
+    fetch = shared._fetch_track_keys
+    monkeypatch.setattr(shared, "_fetch_track_keys", lambda ids: fetched.append(list(ids)) or fetch(ids))
+    _write(mixxx_db, ("UPDATE library SET title = 'Hoochie Coochie Man (live)' WHERE id = ?", (4,)))
+    assert shared.refresh_shared_data()
+    assert fetched == [[2, 4]]
+
+    fetched.clear()
+    _write(mixxx_db, ("UPDATE library SET rating = 5 WHERE id = ?", (4,)))
+    assert shared.refresh_shared_data()
+    assert fetched == []
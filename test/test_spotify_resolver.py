@@ -0,0 +1,146 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from spotipy.exceptions import SpotifyException
+import src.db.notes_db as notes_db
+from src.callbacks.spotify_resolver import SpotifyResolver, track_key, MAX_ATTEMPTS
+
+
+class StubSpotify:
+    """Local stand-in for spotipy.Spotify.search: `catalogue` maps (artist, title) -> track id."""
+
+    def __init__(self, catalogue, failures=(), errors=None):
+        self.catalogue = catalogue
+        self.failures = list(failures)  # exceptions raised by the first calls, in order
+        self.errors = errors or {}      # query -> exception raised every time
+        self.queries = []
+
+    def search(self, q, type, limit):
+        self.queries.append(q)
+        if self.failures:
+            raise self.failures.pop(0)
+        if q in self.errors:
+            raise self.errors[q]
+        for (artist, title), track_id in self.catalogue.items():
+            if q == f"artist:{artist} track:{title}":
+                return {"tracks": {"items": [{"id": track_id, "uri": f"spotify:track:{track_id}"}]}}
+        return {"tracks": {"items": []}}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    conn = sqlite3.connect(notes_db.DB_PATH)
+    with conn:
+        conn.execute("DELETE FROM spotify_tracks")
+    conn.close()
+
+
+def _resolver(client, sleeps=None, **kwargs):
+    return SpotifyResolver(client, workers=2, sleep=(sleeps.append if sleeps is not None else lambda s: None), **kwargs)
+
+
+def _age_cache(days):
+    conn = sqlite3.connect(notes_db.DB_PATH)
+    with conn:
+        conn.execute("UPDATE spotify_tracks SET resolved_at = ?",
+                     ((datetime.utcnow() - timedelta(days=days)).isoformat(),))
+    conn.close()
+
+
+def test_track_key():
+    assert track_key("  Count Basie ", "Jumpin' at the Woodside") == ("count basie", "jumpin' at the woodside")
+    assert track_key("Count Basie", "") is None
+    assert track_key(None, "Song") is None
+
+
+def test_resolve_matches_and_misses():
+    client = StubSpotify({("Etta James", "At Last"): "abc"})
+    results = _resolver(client).resolve([("Etta James", "At Last"), ("Nobody", "Nothing"), ("", "No artist")])
+    assert results == {("etta james", "at last"): {"id": "abc", "uri": "spotify:track:abc"},
+                       ("nobody", "nothing"): None}
+
+
+def test_retries_429_honouring_retry_after():
+    rate_limited = SpotifyException(429, -1, "rate limited", headers={"Retry-After": "3"})
+    client = StubSpotify({("Etta James", "At Last"): "abc"}, failures=[rate_limited, rate_limited])
+    sleeps = []
+    match = _resolver(client, sleeps).search("Etta James", "At Last")
+    assert match == {"id": "abc", "uri": "spotify:track:abc"}
+    assert sleeps == [3.0, 3.0]
+    assert len(client.queries) == 3
+
+
+def test_retries_server_errors_with_backoff_then_gives_up():
+    client = StubSpotify({}, failures=[SpotifyException(503, -1, "unavailable")] * MAX_ATTEMPTS)
+    sleeps = []
+    with pytest.raises(SpotifyException):
+        _resolver(client, sleeps).search("Etta James", "At Last")
+    assert len(client.queries) == MAX_ATTEMPTS
+    assert len(sleeps) == MAX_ATTEMPTS - 1
+    assert all(delay > 0 for delay in sleeps)
+
+
+def test_client_errors_are_not_retried():
+    client = StubSpotify({}, failures=[SpotifyException(400, -1, "bad request")])
+    sleeps = []
+    with pytest.raises(SpotifyException):
+        _resolver(client, sleeps).search("Etta James", "At Last")
+    assert sleeps == []
+
+
+def test_cache_hits_skip_the_api():
+    songs = [("Etta James", "At Last"), ("Nobody", "Nothing")]
+    first = StubSpotify({("Etta James", "At Last"): "abc"})
+    _resolver(first).resolve(songs)
+    assert len(first.queries) == 2
+
+    second = StubSpotify({})
+    results = _resolver(second).resolve(songs)
+    assert second.queries == []  # the match and the miss both come from the cache
+    assert results[("etta james", "at last")] == {"id": "abc", "uri": "spotify:track:abc"}
+    assert results[("nobody", "nothing")] is None
+
+
+def test_cache_lookup_spans_several_statements():
+    keys = [(f"Artist {i}", f"Title {i}") for i in range(notes_db.MAX_QUERY_PARAMS + 10)]
+    notes_db.save_spotify_tracks({key: ({"id": str(i), "uri": f"spotify:track:{i}"} if i % 2 else None)
+                                  for i, key in enumerate(keys)})
+    found = notes_db.get_spotify_tracks(keys + [("Unknown", "Song")], timedelta(days=1), timedelta(days=1))
+    assert len(found) == len(keys)
+    assert found[keys[-1]] == {"id": str(len(keys) - 1), "uri": f"spotify:track:{len(keys) - 1}"}
+    assert found[keys[0]] is None
+
+
+def test_expired_entries_are_searched_again():
+    songs = [("Etta James", "At Last"), ("Nobody", "Nothing")]
+    _resolver(StubSpotify({("Etta James", "At Last"): "abc"})).resolve(songs)
+
+    # Older than the miss TTL but younger than the match TTL: only the miss is retried
+    _age_cache(days=10)
+    client = StubSpotify({("Nobody", "Nothing"): "xyz"})
+    results = _resolver(client, match_ttl=timedelta(days=90), miss_ttl=timedelta(days=7)).resolve(songs)
+    assert client.queries == ["artist:Nobody track:Nothing"]
+    assert results[("nobody", "nothing")] == {"id": "xyz", "uri": "spotify:track:xyz"}
+
+    # Past the match TTL as well: everything is searched again
+    _age_cache(days=100)
+    client = StubSpotify({})
+    _resolver(client, match_ttl=timedelta(days=90), miss_ttl=timedelta(days=7)).resolve(songs)
+    assert len(client.queries) == 2
+
+
+def test_progress_is_reported():
+    progress = []
+    client = StubSpotify({("A", "One"): "a1", ("B", "Two"): "b2"})
+    _resolver(client).resolve([("A", "One"), ("B", "Two")], progress=lambda done, total: progress.append((done, total)))
+    assert progress[0] == (0, 2) and progress[-1] == (2, 2)
+
+
+def test_found_tracks_are_kept_when_a_search_fails():
+    client = StubSpotify({("A", "One"): "a1"},
+                         errors={"artist:B track:Two": SpotifyException(400, -1, "bad request")})
+    with pytest.raises(SpotifyException):
+        SpotifyResolver(client, workers=1, sleep=lambda s: None).resolve([("A", "One"), ("B", "Two")])
+    cached = StubSpotify({})
+    assert _resolver(cached).resolve([("A", "One")]) == {("a", "one"): {"id": "a1", "uri": "spotify:track:a1"}}
+    assert cached.queries == []
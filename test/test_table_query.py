@@ -0,0 +1,43 @@
+import pandas as pd
+from src.callbacks.table_query import parse_filter_query, filter_frame
+
+
+def test_symbol_operators():
+    assert parse_filter_query("{bpm} >= 120 && {rating} < 3") == [
+        ("bpm", "ge", 120.0, False),
+        ("rating", "lt", 3.0, False),
+    ]
+
+
+def test_word_operators_with_case_prefix():
+    assert parse_filter_query('{artist} icontains "basie" && {title} seq Moten') == [
+        ("artist", "contains", "basie", True),
+        ("title", "eq", "Moten", False),
+    ]
+
+
+def test_symbol_operators_with_case_prefix():
+    # What dash-table sends for a header filter when filter_options={"case": ...} is set
+    assert parse_filter_query("{bpm} i>= 120 && {bpm} i= 95 && {rating} s> 3 && {rating} i!= 1") == [
+        ("bpm", "ge", 120.0, True),
+        ("bpm", "eq", 95.0, True),
+        ("rating", "gt", 3.0, False),
+        ("rating", "ne", 1.0, True),
+    ]
+
+
+def test_blank_operators():
+    assert parse_filter_query("{album} is blank && {title} is not blank") == [
+        ("album", "is blank", "", False),
+        ("title", "is not blank", "", False),
+    ]
+
+
+def test_unparsable_terms_are_skipped():
+    assert parse_filter_query("bpm >= 120 && {bpm} >= 100") == [("bpm", "ge", 100.0, False)]
+
+
+def test_prefixed_numeric_filter_applies():
+    df = pd.DataFrame({"artist": ["Count Basie", "Etta James", "Duke Ellington"], "bpm": [130.0, 95.0, 118.0]})
+    assert filter_frame(df, "{bpm} i>= 118")["artist"].tolist() == ["Count Basie", "Duke Ellington"]
+    assert filter_frame(df, '{bpm} i= 95 && {artist} icontains "etta"')["artist"].tolist() == ["Etta James"]
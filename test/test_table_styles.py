@@ -0,0 +1,68 @@
+import numpy as np
+from src.callbacks.table_styles import (value_bins, interpolate_colors, bar_styles, heatmap_styles,
+                                        DARK_TEXT, LIGHT_TEXT)
+
+
+def test_few_distinct_values_get_exact_rules():
+    queries, representatives = value_bins([3, 1, 3, None, 2.5], "rating", bins=5)
+    assert queries == ["{rating} = 1", "{rating} = 2.5", "{rating} = 3"]
+    assert representatives.tolist() == [1, 2.5, 3]
+
+
+def test_many_values_get_at_most_bins_ranges():
+    values = list(range(100)) + [1000]
+    queries, representatives = value_bins(values, "plays", bins=10)
+    # Values 100..999 fall in no range, so those ranges get no rule
+    assert queries == ["{plays} >= 0.0 && {plays} < 100.0", "{plays} >= 900.0 && {plays} <= 1000.0"]
+    assert representatives.tolist() == [50.0, 950.0]
+
+
+def test_ranges_cover_every_value_once():
+    values = np.random.default_rng(0).uniform(0, 50, 500)
+    queries, _ = value_bins(values, "bpm", bins=20)
+    assert len(queries) <= 20
+    bounds = [tuple(float(part.split()[-1]) for part in query.split("&&")) for query in queries]
+    inclusive_last = [query.endswith(f"<= {high!r}") for query, (low, high) in zip(queries, bounds)]
+    assert inclusive_last == [False] * (len(queries) - 1) + [True]
+    for value in values:
+        hits = [low <= value < high or (last and value == high)
+                for (low, high), last in zip(bounds, inclusive_last)]
+        assert sum(hits) == 1
+
+
+def test_floor_leaves_out_lower_values():
+    queries, representatives = value_bins([0, 10, 20, 30], "pct", floor=10)
+    assert queries == ["{pct} = 10", "{pct} = 20", "{pct} = 30"]
+    assert representatives.tolist() == [10, 20, 30]
+    assert value_bins([np.nan, None], "pct")[0] == []
+
+
+def test_interpolate_colors():
+    colors, brightness = interpolate_colors([0, 0.5, 1, 2], (0, 0, 0), (255, 255, 255))
+    assert colors == ["#000000", "#7f7f7f", "#ffffff", "#ffffff"]
+    assert brightness.tolist() == [0, 381, 765, 765]
+
+
+def test_bar_styles_scale_to_the_column_maximum():
+    styles = bar_styles([2, 4, None], "count", color="#123456")
+    assert [style["if"] for style in styles] == [
+        {"column_id": "count", "filter_query": "{count} = 2"},
+        {"column_id": "count", "filter_query": "{count} = 4"},
+    ]
+    assert "#123456 50%, transparent 50%" in styles[0]["background"]
+    assert "#123456 100%, transparent 100%" in styles[1]["background"]
+    assert bar_styles([None], "count") == []
+    assert all("0%, transparent 0%" in style["background"] for style in bar_styles([0, 0], "count"))
+
+
+def test_heatmap_styles_switch_text_color_on_dark_cells():
+    styles = heatmap_styles([0, 50, 100], "pct", start_rgb=(255, 255, 255), end_rgb=(0, 0, 0), fontWeight="bold")
+    assert [style["backgroundColor"] for style in styles] == ["#ffffff", "#7f7f7f", "#000000"]
+    assert [style["color"] for style in styles] == [DARK_TEXT, LIGHT_TEXT, LIGHT_TEXT]
+    assert all(style["fontWeight"] == "bold" for style in styles)
+
+
+def test_heatmap_floor_keeps_low_cells_unstyled():
+    styles = heatmap_styles([0, 50, 100], "pct", floor=50)
+    assert [style["if"]["filter_query"] for style in styles] == ["{pct} = 50", "{pct} = 100"]
+    assert heatmap_styles([7, 7], "pct")[0]["if"]["filter_query"] == "{pct} = 7"